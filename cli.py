@@ -11,12 +11,21 @@ import sys
 import asyncio
 import logging
 import argparse
+import functools
 import json
-import time
+import threading
+from collections import defaultdict, deque
+from dataclasses import dataclass
 from datetime import datetime
 from io import BytesIO
 from PIL import Image
 
+# uvloop is optional; fall back to the default event loop without it
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 # Import WhatsApp library
 from whatsapp import WAClient, WAEventType
 from whatsapp.utils.logger import setup_logging
@@ -40,6 +49,50 @@ BANNER = r'''
 WhatsApp Web Python Library - CLI Tool
 '''
 
+# Help text for the /help command
+HELP_TEXT = "\n".join([
+    "\nAvailable commands:",
+    "  /help               - Show this help message",
+    "  /chat <phone>       - Start or switch to a chat with a contact",
+    "  /send <phone> <msg> - Send a message to a specific contact",
+    "  /status             - Show connection status",
+    "  /scan               - Request a new QR code",
+    "  /logout             - Log out from WhatsApp Web",
+    "  /reconnect          - Reconnect to WhatsApp Web",
+    "  /quit or /exit      - Exit the application",
+    "\nDirect messages:",
+    "  When a chat is active, you can type messages directly"
+])
+
+# Shades used to render the QR code as ASCII art, darkest last
+QR_SHADES = ["  ", "░░", "▒▒", "▓▓", "██"]
+
+# Grayscale value -> shade lookup, so a whole row converts in one str.translate call
+QR_SHADE_TABLE = {
+    value: QR_SHADES[min(len(QR_SHADES) - 1, value // 51)]
+    for value in range(256)
+}
+
+@dataclass(slots=True)
+class HistoryEntry:
+    """A message kept in the CLI history"""
+    id: str
+    to: str
+    sender: str
+    from_me: bool
+    text: str
+    timestamp: float
+
+@functools.lru_cache(maxsize=256)
+def format_timestamp(timestamp):
+    """
+    Format a Unix timestamp as HH:MM:SS, cached since messages often share a second
+    
+    Args:
+        timestamp: Unix timestamp in whole seconds
+    """
+    return datetime.fromtimestamp(timestamp).strftime('%H:%M:%S')
+
 class WhatsAppCLI:
     """Command-line interface for WhatsApp Web"""
     
@@ -53,6 +106,7 @@ class WhatsAppCLI:
         """
         self.session_path = session_path or os.path.join(os.getcwd(), "whatsapp_session")
         os.makedirs(self.session_path, exist_ok=True)
+        self.qr_path = os.path.join(self.session_path, "qrcode.png")
         
         # Configure logging
         setup_logging(level=log_level)
@@ -62,10 +116,36 @@ class WhatsAppCLI:
         self.client = None
         self.running = False
         self.message_queue = asyncio.Queue()
+        self.input_queue = None
+        self.current_recipient = None
+        
+        # Outgoing messages are queued and delivered in small batches
+        self.send_queue = asyncio.Queue()
+        self.send_batch_size = 16
+        self.send_batch_delay = 0.05
+        # Seconds to wait on exit for queued messages to be delivered
+        self.send_drain_timeout = 10.0
+        
+        # Command name -> handler, used by process_command
+        self.commands = {
+            "help": self._cmd_help,
+            "quit": self._cmd_quit,
+            "exit": self._cmd_quit,
+            "chat": self._cmd_chat,
+            "send": self._cmd_send,
+            "status": self._cmd_status,
+            "scan": self._cmd_scan,
+            "logout": self._cmd_logout,
+            "reconnect": self._cmd_reconnect
+        }
         
         # Message history for display
-        self.message_history = []
         self.max_history = 100
+        self.message_history = deque(maxlen=self.max_history)
+        
+        # Recent messages per contact, for quick lookup when switching chats
+        self.recent_per_peer = 5
+        self.history_by_peer = defaultdict(lambda: deque(maxlen=self.recent_per_peer))
         
     async def initialize(self):
         """Initialize the WhatsApp client"""
@@ -80,6 +160,11 @@ class WhatsAppCLI:
         self.client.on(WAEventType.CONNECTION_CLOSE, self.handle_connection_close)
         self.client.on(WAEventType.MESSAGE_SENT, self.handle_message_sent)
         
+        # Read console input on the event loop, or on a single long-lived
+        # thread where the loop cannot watch stdin (e.g. Windows)
+        self.input_queue = asyncio.Queue()
+        self._start_input_reader(asyncio.get_running_loop())
+        
         print(BANNER)
         print("\nInitializing WhatsApp Web client...")
     
@@ -99,16 +184,21 @@ class WhatsAppCLI:
     
     async def run(self):
         """Run the CLI main loop"""
-        # Start consumer task
+        # Start consumer tasks
         consumer_task = asyncio.create_task(self.message_consumer())
+        sender_task = asyncio.create_task(self._send_batcher())
         
         # Main input loop
         while self.running:
             try:
-                # Get user input
-                user_input = await asyncio.get_event_loop().run_in_executor(
-                    None, self.get_user_input
-                )
+                # Prompt once the previous command has finished, so its output
+                # comes before the prompt, then get user input
+                print("\n> ", end="", flush=True)
+                user_input = await self.input_queue.get()
+                if user_input is None:
+                    # Console input closed
+                    self.running = False
+                    break
                 
                 # Process input
                 await self.process_input(user_input)
@@ -122,20 +212,85 @@ class WhatsAppCLI:
             except Exception as e:
                 print(f"Error processing input: {str(e)}")
         
-        # Cancel consumer task
-        consumer_task.cancel()
-        try:
-            await consumer_task
-        except asyncio.CancelledError:
-            pass
+        # Deliver anything still queued, but stop waiting if the sender task
+        # ends or the drain times out, then cancel consumer tasks
+        drain_task = asyncio.create_task(self.send_queue.join())
+        await asyncio.wait(
+            (drain_task, sender_task),
+            timeout=self.send_drain_timeout,
+            return_when=asyncio.FIRST_COMPLETED
+        )
+        if not drain_task.done():
+            drain_task.cancel()
+            print("Could not deliver all queued messages, exiting anyway")
+        for task in (consumer_task, sender_task):
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                self.logger.error(f"Background task failed: {e}")
         
         # Disconnect client
         if self.client:
             await self.client.disconnect()
     
     def get_user_input(self):
-        """Get user input from console"""
-        return input("\n> ")
+        """Get user input from console; the prompt is printed by run()"""
+        return input()
+    
+    def _start_input_reader(self, loop):
+        """
+        Start feeding console input lines into the input queue
+        
+        Args:
+            loop: Event loop that owns the input queue
+        """
+        try:
+            stdin_fd = sys.stdin.fileno()
+            loop.add_reader(stdin_fd, self._on_stdin_ready, loop, stdin_fd)
+        except (AttributeError, NotImplementedError, OSError, ValueError):
+            threading.Thread(target=self._reader_loop, args=(loop,), daemon=True).start()
+            return
+        
+        self._stdin_buffer = b""
+    
+    def _on_stdin_ready(self, loop, stdin_fd):
+        """
+        Read the available console input and queue every complete line
+        
+        Args:
+            loop: Event loop watching stdin
+            stdin_fd: File descriptor of stdin
+        """
+        data = os.read(stdin_fd, 4096)
+        if not data:
+            # Console input closed, keep any unterminated last line
+            loop.remove_reader(stdin_fd)
+            if self._stdin_buffer:
+                self.input_queue.put_nowait(self._stdin_buffer.decode(errors="replace"))
+            self.input_queue.put_nowait(None)
+            return
+        
+        *lines, self._stdin_buffer = (self._stdin_buffer + data).split(b"\n")
+        for line in lines:
+            self.input_queue.put_nowait(line.decode(errors="replace").rstrip("\r"))
+    
+    def _reader_loop(self, loop):
+        """
+        Read console input forever and hand each line to the event loop
+        
+        Args:
+            loop: Event loop that owns the input queue
+        """
+        while True:
+            try:
+                line = self.get_user_input()
+            except (EOFError, KeyboardInterrupt):
+                loop.call_soon_threadsafe(self.input_queue.put_nowait, None)
+                return
+            loop.call_soon_threadsafe(self.input_queue.put_nowait, line)
     
     async def process_input(self, user_input):
         """
@@ -152,7 +307,7 @@ class WhatsAppCLI:
             await self.process_command(user_input[1:])
         else:
             # Check if we have an active recipient
-            if hasattr(self, 'current_recipient') and self.current_recipient:
+            if self.current_recipient:
                 # Send message to current recipient
                 await self.send_message(self.current_recipient, user_input)
             else:
@@ -165,94 +320,89 @@ class WhatsAppCLI:
         Args:
             command: Command string without the leading slash
         """
-        parts = command.strip().split(" ", 1)
-        cmd = parts[0].lower()
-        args = parts[1] if len(parts) > 1 else ""
+        cmd, _, args = command.strip().partition(" ")
+        cmd = cmd.lower()
         
-        if cmd == "help":
+        handler = self.commands.get(cmd)
+        if handler is None:
+            print(f"Unknown command: {cmd}")
             self.show_help()
+            return
         
-        elif cmd == "quit" or cmd == "exit":
-            print("Exiting...")
-            self.running = False
-        
-        elif cmd == "chat":
-            if not args:
-                print("Usage: /chat <phone_number>")
-                return
-            
-            # Set current recipient
-            self.current_recipient = args.strip()
-            print(f"Chat active with {self.current_recipient}")
-            
-            # Show recent messages
-            matching_messages = [
-                msg for msg in self.message_history 
-                if msg['to'] == self.current_recipient or msg['from'] == self.current_recipient
-            ]
-            if matching_messages:
-                print("\nRecent messages:")
-                for msg in matching_messages[-5:]:
-                    direction = ">>>" if msg['from_me'] else "<<<"
-                    print(f"{direction} {msg['text']}")
-            else:
-                print("No message history with this contact.")
-        
-        elif cmd == "send":
-            parts = args.split(" ", 1)
-            if len(parts) < 2:
-                print("Usage: /send <phone_number> <message>")
-                return
-            
-            recipient = parts[0].strip()
-            message = parts[1].strip()
-            
-            await self.send_message(recipient, message)
-        
-        elif cmd == "status":
-            self.show_status()
-        
-        elif cmd == "scan":
-            if not self.client.authenticated:
-                print("Requesting new QR code...")
-                # This is simplified - in a real implementation,
-                # we would request a new QR code from the server
-                print("Please reconnect to get a new QR code.")
-            else:
-                print("Already authenticated.")
-        
-        elif cmd == "logout":
-            if self.client and self.client.authenticated:
-                await self.client.logout()
-                print("Logged out successfully.")
-            else:
-                print("Not logged in.")
+        await handler(args)
+    
+    async def _cmd_help(self, args):
+        """Handle the /help command"""
+        self.show_help()
+    
+    async def _cmd_quit(self, args):
+        """Handle the /quit and /exit commands"""
+        print("Exiting...")
+        self.running = False
+    
+    async def _cmd_chat(self, args):
+        """Handle the /chat <phone_number> command"""
+        if not args:
+            print("Usage: /chat <phone_number>")
+            return
         
-        elif cmd == "reconnect":
-            if self.client:
-                await self.client.disconnect()
-                time.sleep(1)
-                await self.client.connect()
-            else:
-                print("Client not initialized.")
+        # Set current recipient
+        self.current_recipient = args.strip()
+        print(f"Chat active with {self.current_recipient}")
+        
+        # Show recent messages
+        matching_messages = self.history_by_peer.get(self.current_recipient, ())
+        if matching_messages:
+            print("\nRecent messages:")
+            for msg in matching_messages:
+                direction = ">>>" if msg.from_me else "<<<"
+                print(f"{direction} {msg.text}")
+        else:
+            print("No message history with this contact.")
+    
+    async def _cmd_send(self, args):
+        """Handle the /send <phone_number> <message> command"""
+        recipient, separator, message = args.partition(" ")
+        if not separator:
+            print("Usage: /send <phone_number> <message>")
+            return
         
+        await self.send_message(recipient.strip(), message.strip())
+    
+    async def _cmd_status(self, args):
+        """Handle the /status command"""
+        self.show_status()
+    
+    async def _cmd_scan(self, args):
+        """Handle the /scan command"""
+        if not self.client.authenticated:
+            print("Requesting new QR code...")
+            # This is simplified - in a real implementation,
+            # we would request a new QR code from the server
+            print("Please reconnect to get a new QR code.")
         else:
-            print(f"Unknown command: {cmd}")
-            self.show_help()
+            print("Already authenticated.")
+    
+    async def _cmd_logout(self, args):
+        """Handle the /logout command"""
+        if self.client and self.client.authenticated:
+            await self.client.logout()
+            print("Logged out successfully.")
+        else:
+            print("Not logged in.")
+    
+    async def _cmd_reconnect(self, args):
+        """Handle the /reconnect command"""
+        if self.client:
+            await self.client.disconnect()
+            await asyncio.sleep(1)
+            await self.client.connect()
+        else:
+            print("Client not initialized.")
     
     def show_help(self):
         """Show help information"""
-        print("\nAvailable commands:")
-        print("  /help               - Show this help message")
-        print("  /chat <phone>       - Start or switch to a chat with a contact")
-        print("  /send <phone> <msg> - Send a message to a specific contact")
-        print("  /status             - Show connection status")
-        print("  /scan               - Request a new QR code")
-        print("  /logout             - Log out from WhatsApp Web")
-        print("  /reconnect          - Reconnect to WhatsApp Web")
-        print("  /quit or /exit      - Exit the application")
-        print("\nDirect messages:")
-        print("  When a chat is active, you can type messages directly")
+        print(HELP_TEXT)
     
     def show_status(self):
         """Show current status"""
@@ -263,20 +413,24 @@ class WhatsAppCLI:
         status = "Authenticated" if self.client.authenticated else "Not authenticated"
         connection = "Connected" if self.client.connection.is_connected() else "Disconnected"
         
-        print("\nStatus:")
-        print(f"  Connection: {connection}")
-        print(f"  Authentication: {status}")
+        lines = [
+            "\nStatus:",
+            f"  Connection: {connection}",
+            f"  Authentication: {status}"
+        ]
         
         if self.client.authenticated and self.client.user_info:
-            print(f"  User: {self.client.user_info.get('name', 'Unknown')}")
-            print(f"  Phone: {self.client.user_info.get('phone', 'Unknown')}")
+            lines.append(f"  User: {self.client.user_info.get('name', 'Unknown')}")
+            lines.append(f"  Phone: {self.client.user_info.get('phone', 'Unknown')}")
         
-        if hasattr(self, 'current_recipient') and self.current_recipient:
-            print(f"  Active chat: {self.current_recipient}")
+        if self.current_recipient:
+            lines.append(f"  Active chat: {self.current_recipient}")
+        
+        print("\n".join(lines))
     
     async def send_message(self, recipient, text):
         """
-        Send a message to a recipient
+        Queue a message for delivery to a recipient
         
         Args:
             recipient: Phone number or group ID
@@ -286,29 +440,88 @@ class WhatsAppCLI:
             print("Not authenticated. Please scan the QR code first.")
             return
         
+        await self.send_queue.put((recipient, text))
+    
+    async def _send_batcher(self):
+        """Consumer task that delivers queued outgoing messages in batches"""
+        loop = asyncio.get_running_loop()
+        while True:
+            # Wait for the first message, then collect more until the batch
+            # is full or the batching delay has passed
+            batch = [await self.send_queue.get()]
+            deadline = loop.time() + self.send_batch_delay
+            while len(batch) < self.send_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.send_queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Group by recipient so each chat keeps its message order,
+            # while different chats are sent concurrently
+            by_recipient = {}
+            for recipient, text in batch:
+                by_recipient.setdefault(recipient, []).append(text)
+            
+            await asyncio.gather(*(
+                self._send_to_recipient(recipient, texts)
+                for recipient, texts in by_recipient.items()
+            ))
+            
+            for _ in batch:
+                self.send_queue.task_done()
+    
+    async def _send_to_recipient(self, recipient, texts):
+        """
+        Send queued messages to one recipient in order
+        
+        Args:
+            recipient: Phone number or group ID
+            texts: Message texts to send
+        """
+        for text in texts:
+            await self._deliver_message(recipient, text)
+    
+    async def _deliver_message(self, recipient, text):
+        """
+        Send a single message and store it in the history
+        
+        Args:
+            recipient: Phone number or group ID
+            text: Message text
+        """
         try:
             print(f"Sending message to {recipient}...")
             message = await self.client.send_message(recipient, text)
             
             # Store in history
-            self.message_history.append({
-                'id': message.id,
-                'to': message.to,
-                'from': self.client.user_info.get('id', 'me'),
-                'from_me': True,
-                'text': message.text,
-                'timestamp': message.timestamp
-            })
-            
-            # Trim history if needed
-            if len(self.message_history) > self.max_history:
-                self.message_history = self.message_history[-self.max_history:]
+            self._record_history(HistoryEntry(
+                id=message.id,
+                to=message.to,
+                sender=self.client.user_info.get('id', 'me'),
+                from_me=True,
+                text=message.text,
+                timestamp=message.timestamp
+            ))
             
         except WAMessageError as e:
             print(f"Failed to send message: {str(e)}")
         except Exception as e:
             print(f"Unexpected error while sending message: {str(e)}")
     
+    def _record_history(self, entry):
+        """
+        Store a message in the history and the per-contact index
+        
+        Args:
+            entry: History entry
+        """
+        self.message_history.append(entry)
+        peer = entry.to if entry.from_me else entry.sender
+        self.history_by_peer[peer].append(entry)
+    
     async def handle_qr_code(self, qr_data):
         """
         Handle QR code event
@@ -322,35 +535,21 @@ class WhatsAppCLI:
         try:
             qr_image = qr_data.get('qr_image')
             if qr_image:
-                # Save QR code to file
-                with open(os.path.join(self.session_path, "qrcode.png"), "wb") as f:
-                    f.write(qr_image)
-                
-                print(f"QR code saved to {os.path.join(self.session_path, 'qrcode.png')}")
-                
-                # Try to display in terminal using ASCII art
-                img = Image.open(BytesIO(qr_image))
+                loop = asyncio.get_running_loop()
                 
-                # Convert image to ASCII art
-                width, height = img.size
-                aspect_ratio = height/width
+                # ASCII art is useless when output is piped, so only save the image
+                if not sys.stdout.isatty():
+                    await loop.run_in_executor(None, self._save_qr_image, qr_image)
+                    print(f"QR code saved to {self.qr_path}")
+                    return
                 
-                # Resize image, maintaining aspect ratio
-                new_width = 40
-                new_height = int(aspect_ratio * new_width * 0.5)
-                img = img.resize((new_width, new_height))
-                
-                # Convert to grayscale and then to ASCII
-                img = img.convert('L')
-                pixels = list(img.getdata())
-                
-                # ASCII art - simplistic
-                chars = ["  ", "░░", "▒▒", "▓▓", "██"]
+                # Saving and decoding the image blocks, so keep it off the event loop
+                lines = await loop.run_in_executor(
+                    None, self._render_qr_sync, qr_image, qr_data.get('qr_matrix')
+                )
                 
-                # Print the ASCII art
-                for i in range(0, len(pixels), new_width):
-                    line = "".join([chars[min(len(chars)-1, pixel // 51)] for pixel in pixels[i:i+new_width]])
-                    print(line)
+                print(f"QR code saved to {self.qr_path}")
+                print("\n".join(lines))
                 
             else:
                 # If can't convert to image, print data for manual QR generation
@@ -361,6 +560,57 @@ class WhatsAppCLI:
             print(f"Could not display QR code image: {str(e)}")
             print(f"QR Data: {qr_data.get('qr_data')}")
     
+    def _save_qr_image(self, qr_image):
+        """
+        Save the QR code image to the session directory
+        
+        Args:
+            qr_image: PNG image data
+        """
+        with open(self.qr_path, "wb") as f:
+            f.write(qr_image)
+    
+    def _render_qr_sync(self, qr_image, qr_matrix=None):
+        """
+        Save the QR code image to the session directory and render it as ASCII art
+        
+        Args:
+            qr_image: PNG image data
+            qr_matrix: Optional QR module matrix, True for dark modules
+            
+        Returns:
+            list: Lines of the ASCII art QR code
+        """
+        self._save_qr_image(qr_image)
+        
+        # Render straight from the modules when available, skipping PNG decoding
+        if qr_matrix:
+            dark, light = QR_SHADES[0], QR_SHADES[-1]
+            return [
+                "".join([dark if module else light for module in row])
+                for row in qr_matrix
+            ]
+        
+        # Try to display in terminal using ASCII art, converting to
+        # grayscale first so the resize only works on a single channel
+        img = Image.open(BytesIO(qr_image)).convert('L')
+        
+        # Convert image to ASCII art
+        width, height = img.size
+        aspect_ratio = height/width
+        
+        # Resize image, maintaining aspect ratio; the QR is two-tone, so
+        # nearest-neighbour sampling keeps the modules without interpolating
+        new_width = 40
+        new_height = int(aspect_ratio * new_width * 0.5)
+        pixels = img.resize((new_width, new_height), Image.NEAREST).tobytes()
+        
+        # Map every pixel of a row to its shade in a single pass
+        return [
+            pixels[i:i + new_width].decode('latin-1').translate(QR_SHADE_TABLE)
+            for i in range(0, len(pixels), new_width)
+        ]
+    
     async def handle_message(self, message):
         """
         Handle incoming message event
@@ -380,27 +630,22 @@ class WhatsAppCLI:
                 
                 # Process message
                 sender = message.to if message.from_me else message.to
-                direction = ">>>" if message.from_me else "<<<"
                 
                 # Store in history
-                self.message_history.append({
-                    'id': message.id,
-                    'to': message.to,
-                    'from': sender,
-                    'from_me': message.from_me,
-                    'text': message.text,
-                    'timestamp': message.timestamp
-                })
-                
-                # Trim history if needed
-                if len(self.message_history) > self.max_history:
-                    self.message_history = self.message_history[-self.max_history:]
+                self._record_history(HistoryEntry(
+                    id=message.id,
+                    to=message.to,
+                    sender=sender,
+                    from_me=message.from_me,
+                    text=message.text,
+                    timestamp=message.timestamp
+                ))
                 
-                # Only show if we're in a chat with this contact
-                if (hasattr(self, 'current_recipient') and 
-                    self.current_recipient and 
-                    (self.current_recipient == message.to or self.current_recipient == sender)):
-                    timestamp = datetime.fromtimestamp(message.timestamp).strftime('%H:%M:%S')
+                # Only format and show if we're in a chat with this contact
+                active = self.current_recipient
+                if active and (active == message.to or active == sender):
+                    timestamp = format_timestamp(int(message.timestamp))
+                    direction = ">>>" if message.from_me else "<<<"
                     print(f"\n[{timestamp}] {direction} {message.text}")
                     print("> ", end="", flush=True)  # Restore prompt
                 
@@ -410,7 +655,7 @@ class WhatsAppCLI:
             except asyncio.CancelledError:
                 break
             except Exception as e:
-                self.logger.error(f"Error processing message: {str(e)}")
+                self.logger.error("Error processing message: %s", e)
     
     async def handle_authenticated(self, user_info):
         """
@@ -502,4 +747,7 @@ async def main():
             await cli.client.disconnect()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
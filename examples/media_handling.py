@@ -7,17 +7,35 @@ like images, documents, and videos using the improved WhatsApp Web Python librar
 """
 
 import argparse
+import asyncio
 import logging
 import os
+import signal
 import sys
-import time
 
 # Add parent directory to path to import wawspy when running from examples directory
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from wawspy import WAClient, WAConnectionError, WAMessageError, WAMediaError
 
-def main():
+# Message keys that mark an incoming message as carrying media
+MEDIA_MESSAGE_KEYS = frozenset({"imageMessage", "videoMessage", "audioMessage", "documentMessage"})
+
+# File extension -> (media type, client send method, whether a caption is sent)
+MEDIA_SEND_DISPATCH = {
+    ext: (media_type, method, with_caption)
+    for exts, media_type, method, with_caption in (
+        (('.jpg', '.jpeg', '.png', '.gif'), "Image", "send_image", True),
+        (('.mp4', '.3gp', '.mov'), "Video", "send_video", True),
+        (('.mp3', '.ogg', '.m4a', '.wav'), "Audio", "send_audio", False),
+    )
+    for ext in exts
+}
+
+# Anything not listed above is sent as a document
+DEFAULT_MEDIA_SEND = ("Document", "send_document", True)
+
+async def main():
     """Main function to demonstrate media handling with WhatsApp."""
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Send media through WhatsApp')
@@ -47,8 +65,7 @@ def main():
                 print(f"\nReceived message: {message}")
                 
                 # Check if it's a media message
-                if any(key in message for key in ["imageMessage", "videoMessage", 
-                                                 "audioMessage", "documentMessage"]):
+                if isinstance(message, dict) and not MEDIA_MESSAGE_KEYS.isdisjoint(message):
                     print("This is a media message!")
                     
                     # Process and download the media
@@ -62,11 +79,11 @@ def main():
         
         # Connect to WhatsApp Web
         print("Connecting to WhatsApp Web...")
-        client.connect()
+        await client.connect()
         
         # Wait for authentication
         print("Please authenticate by scanning the QR code with WhatsApp on your phone")
-        authenticated = client.wait_for_authentication(timeout=120)
+        authenticated = await client.wait_for_authentication(timeout=120)
         
         if not authenticated:
             print("Authentication failed or timed out")
@@ -82,32 +99,28 @@ def main():
         _, file_ext = os.path.splitext(file_path.lower())
         
         # Send different types of media based on file extension
-        if file_ext in ['.jpg', '.jpeg', '.png', '.gif']:
-            print(f"Sending image to {recipient}")
-            result = client.send_image(recipient, file_path, caption)
-            media_type = "Image"
-        elif file_ext in ['.mp4', '.3gp', '.mov']:
-            print(f"Sending video to {recipient}")
-            result = client.send_video(recipient, file_path, caption)
-            media_type = "Video"
-        elif file_ext in ['.mp3', '.ogg', '.m4a', '.wav']:
-            print(f"Sending audio to {recipient}")
-            result = client.send_audio(recipient, file_path)
-            media_type = "Audio"
+        media_type, method, with_caption = MEDIA_SEND_DISPATCH.get(file_ext, DEFAULT_MEDIA_SEND)
+        print(f"Sending {media_type.lower()} to {recipient}")
+        send = getattr(client, method)
+        if with_caption:
+            result = await send(recipient, file_path, caption)
         else:
-            print(f"Sending document to {recipient}")
-            result = client.send_document(recipient, file_path, caption)
-            media_type = "Document"
+            result = await send(recipient, file_path)
             
         print(f"{media_type} sent successfully. ID: {result['id']}")
         
-        # Wait for messages (including potential media responses)
+        # Wait for messages (including potential media responses) until
+        # Ctrl+C is pressed or the connection is closed
         print("\nWaiting for messages (press Ctrl+C to exit)...")
+        stop_event = asyncio.Event()
+        client.register_callback("disconnected", lambda close_info: stop_event.set())
         try:
-            while True:
-                time.sleep(1)
-        except KeyboardInterrupt:
-            print("\nExiting message loop")
+            asyncio.get_running_loop().add_signal_handler(signal.SIGINT, stop_event.set)
+        except NotImplementedError:
+            # Windows does not support add_signal_handler; Ctrl+C still raises KeyboardInterrupt
+            pass
+        await stop_event.wait()
+        print("\nExiting message loop")
         
     except WAConnectionError as e:
         print(f"Connection error: {e}")
@@ -122,9 +135,12 @@ def main():
     finally:
         # Disconnect
         print("Disconnecting...")
-        if client:
-            client.disconnect()
+        if client.is_connected:
+            await client.disconnect()
         print("Done.")
 
 if __name__ == "__main__":
-    main()
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\nOperation cancelled by user")
@@ -7,17 +7,17 @@ using the improved WhatsApp Web Python library.
 """
 
 import argparse
+import asyncio
 import logging
 import os
 import sys
-import time
 
 # Add parent directory to path to import wawspy when running from examples directory
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from wawspy import WAClient, WAConnectionError, WAMessageError
 
-def main():
+async def main():
     """Main function to demonstrate sending a WhatsApp message."""
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Send a WhatsApp message')
@@ -53,11 +53,11 @@ def main():
         
         # Connect to WhatsApp Web
         print("Connecting to WhatsApp Web...")
-        client.connect()
+        await client.connect()
         
         # Wait for authentication
         print("Please authenticate by scanning the QR code with WhatsApp on your phone")
-        authenticated = client.wait_for_authentication(timeout=120)
+        authenticated = await client.wait_for_authentication(timeout=120)
         
         if not authenticated:
             print("Authentication failed or timed out")
@@ -70,13 +70,13 @@ def main():
         message_text = args.message
         
         print(f"Sending message to {recipient}: {message_text}")
-        result = client.send_message(recipient, message_text)
+        result = await client.send_message(recipient, message_text)
         
         print(f"Message sent successfully. ID: {result['id']}")
         
         # Wait a bit to make sure message is delivered
         print("Waiting for message delivery...")
-        time.sleep(5)
+        await asyncio.sleep(5)
         
     except WAConnectionError as e:
         print(f"Connection error: {e}")
@@ -89,9 +89,12 @@ def main():
     finally:
         # Disconnect
         print("Disconnecting...")
-        if client:
-            client.disconnect()
+        if client.is_connected:
+            await client.disconnect()
         print("Done.")
 
 if __name__ == "__main__":
-    main()
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\nOperation cancelled by user")
@@ -7,23 +7,32 @@ la WhatsApp Web, emulând un browser real, dar fără a depinde de biblioteci ex
 complexe care pot cauza probleme de compatibilitate.
 """
 
-import base64
+import asyncio
+import inspect
 import json
 import logging
 import os
+import secrets
 import sys
-import time
 import uuid
-import websocket
-import threading
+import websockets
 import requests
-from typing import Dict, Any, Callable
+from requests.cookies import get_cookie_header
+from typing import Dict, Any, Callable, List, Optional
+from urllib.parse import quote
 import qrcode
-from PIL import Image
+
+# uvloop este opțional; fără el folosim bucla asyncio implicită
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
 # Adăugăm directorul părinte în path pentru a importa modulele proprii
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from wawspy.utils import render_half_blocks
+
 # Parametri pentru conexiunea WhatsApp Web
 WA_WEB_PARAMS = {
     "WS_URL": "wss://web.whatsapp.com/ws/chat",
@@ -35,14 +44,42 @@ WA_WEB_PARAMS = {
     "WS_PROTOCOLS": ["v-rvosdlz7cqwcpv6tpg6qn6y", "chat"],
 }
 
+# Datele de browser din URL, serializate și codificate o singură dată
+_BROWSER_DATA = quote(json.dumps({
+    "actual_browser": "Chrome",
+    "actual_version": "124.0.6367.91"
+}))
+
+# Câmpurile fixe ale mesajului de inițializare; clientId se adaugă la trimitere
+_INIT_MESSAGE_TEMPLATE = {
+    "connectType": "WIFI_UNKNOWN",
+    "connectReason": "USER_ACTIVATED",
+    "connectAttempt": 1,
+    "isNewLogin": True,
+    "passive": False,
+    "userAgent": WA_WEB_PARAMS["UA"],
+    "webVersion": WA_WEB_PARAMS["WA_VERSION"],
+    "browserName": "Chrome",
+    "browserVersion": "124.0.6367.91"
+}
+
 class SimpleWhatsAppClient:
     """
     Client simplu pentru WhatsApp Web care demonstrează conexiunea
     cu un număr minim de dependențe externe.
     """
     
-    def __init__(self, log_level=logging.INFO):
-        """Inițializează clientul simplu WhatsApp Web."""
+    def __init__(self, log_level=logging.INFO, session_path: Optional[str] = None,
+                 compression: bool = True):
+        """
+        Inițializează clientul simplu WhatsApp Web.
+        
+        Args:
+            log_level: Nivelul de logging
+            session_path: Directorul în care se păstrează datele sesiunii (ID-ul client)
+            compression: Negociază permessage-deflate pe WebSocket; poate fi
+                dezactivat pentru conexiuni locale, unde compresia doar adaugă cost
+        """
         # Configurare logging
         logging.basicConfig(
             level=log_level,
@@ -50,14 +87,53 @@ class SimpleWhatsAppClient:
         )
         self.logger = logging.getLogger("SimpleWhatsAppClient")
         
+        # Verificat o singură dată, pentru a nu formata mesaje de debug pe fiecare cadru
+        self._debug_enabled = self.logger.isEnabledFor(logging.DEBUG)
+        
         # Conexiune WebSocket
         self.ws = None
         self.connected = False
         self.authenticated = False
+        self.compression = compression
+        
+        # Cei care așteaptă următorul cod QR și evenimentul de închidere a conexiunii
+        self._qr_waiters = []
+        self.closed = asyncio.Event()
         
-        # Generare ID client unic
-        self.client_id = self._generate_client_id()
-        self.logger.info(f"Client ID generat: {self.client_id}")
+        # Task-ul care citește mesajele primite pe bucla asyncio
+        self._listener_task = None
+        
+        # Coada de cadre de trimis, golită în loturi de un singur task de scriere
+        self._send_queue = None
+        self._writer_task = None
+        self.send_batch_size = 50
+        
+        # Coada mărginită de cadre primite, procesate în loturi de un singur consumator
+        self._receive_queue = None
+        self._consumer_task = None
+        self.receive_queue_size = 1024
+        self.receive_batch_size = 64
+        
+        # Sesiune HTTP reutilizată între conectări (keep-alive și cookies)
+        self._http = None
+        
+        # ID-ul client este păstrat în directorul sesiunii, pentru ca WhatsApp
+        # să recunoască același client la pornirile următoare
+        self.session_path = session_path or os.path.join(os.getcwd(), "whatsapp_session")
+        os.makedirs(self.session_path, exist_ok=True)
+        self.client_id = self._load_client_id()
+        
+        # ID-ul de browser și URL-ul WebSocket rămân aceleași la reconectare,
+        # la fel ca într-un browser real
+        self.browser_id = uuid.uuid4().hex[:8]
+        self._ws_url = (
+            f"{WA_WEB_PARAMS['WS_URL']}?v={WA_WEB_PARAMS['WA_VERSION']}"
+            f"&browser={WA_WEB_PARAMS['BROWSER_VERSION']}&browser_data={_BROWSER_DATA}"
+            f"&clientId={self.client_id}&browser_id={self.browser_id}"
+        )
+        
+        # Generator QR, creat la primul cod QR primit
+        self._qr = None
         
         # Callbacks pentru evenimente
         self.callbacks = {
@@ -65,10 +141,45 @@ class SimpleWhatsAppClient:
             "message": None,
             "connected": None
         }
+        
+        # Handlere pentru mesajele primite, după câmpul "type"
+        self._handlers = {
+            "qr": self._handle_qr,
+            "message": self._handle_message
+        }
     
     def _generate_client_id(self) -> str:
-        """Generează un ID client pentru conectare."""
-        return base64.b64encode(uuid.uuid4().bytes).decode('utf-8')
+        """Generează un ID client pentru conectare (16 octeți aleatori, base64 URL-safe)."""
+        return secrets.token_urlsafe(16)
+    
+    def _load_client_id(self) -> str:
+        """Citește ID-ul client salvat în sesiune sau generează și salvează unul nou."""
+        id_file = os.path.join(self.session_path, "client_id")
+        
+        try:
+            with open(id_file, "r", encoding="utf-8") as f:
+                client_id = f.read().strip()
+            if client_id:
+                self.logger.info(f"Client ID restaurat: {client_id}")
+                return client_id
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self.logger.warning(f"Nu s-a putut citi ID-ul client salvat: {e}")
+        
+        client_id = self._generate_client_id()
+        self.logger.info(f"Client ID generat: {client_id}")
+        
+        # Scriere atomică: fișierul temporar înlocuiește dintr-o dată fișierul final
+        try:
+            tmp_file = f"{id_file}.tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                f.write(client_id)
+            os.replace(tmp_file, id_file)
+        except OSError as e:
+            self.logger.warning(f"Nu s-a putut salva ID-ul client: {e}")
+        
+        return client_id
     
     def register_callback(self, event_type: str, callback: Callable) -> None:
         """
@@ -83,72 +194,136 @@ class SimpleWhatsAppClient:
         else:
             self.logger.warning(f"Tip de eveniment necunoscut: {event_type}")
     
-    def _on_message(self, ws, message) -> None:
+    def _get_http_session(self) -> requests.Session:
+        """Returnează sesiunea HTTP partajată, creând-o la prima utilizare."""
+        if self._http is None:
+            self._http = requests.Session()
+            self._http.headers.update({
+                "User-Agent": WA_WEB_PARAMS["UA"],
+                "Accept-Language": "en-US,en;q=0.9",
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                "Cache-Control": "max-age=0"
+            })
+        return self._http
+    
+    async def _notify(self, event_type: str, data: Any) -> None:
+        """Apelează callback-ul înregistrat, fie el funcție obișnuită sau corutină."""
+        callback = self.callbacks.get(event_type)
+        if callback:
+            result = callback(data)
+            if inspect.isawaitable(result):
+                await result
+    
+    async def _listen(self) -> None:
+        """Citește mesajele primite până la închiderea conexiunii WebSocket."""
+        try:
+            # Coada mărginită oprește citirea când consumatorul rămâne în urmă
+            async for message in self.ws:
+                await self._receive_queue.put(message)
+        except websockets.ConnectionClosedError as e:
+            self.logger.error(f"Eroare WebSocket: {e}")
+        finally:
+            # Lăsăm consumatorul să proceseze cadrele deja primite
+            await self._receive_queue.join()
+            self._on_close(self.ws.close_code, self.ws.close_reason)
+    
+    async def _consume(self) -> None:
+        """Procesează cadrele primite, preluând la fiecare trezire tot ce s-a acumulat."""
+        while True:
+            batch = [await self._receive_queue.get()]
+            while len(batch) < self.receive_batch_size and not self._receive_queue.empty():
+                batch.append(self._receive_queue.get_nowait())
+            
+            for message in batch:
+                await self._on_message(message)
+                self._receive_queue.task_done()
+    
+    async def _on_message(self, message) -> None:
         """Handler pentru mesajele primite de la WhatsApp Web."""
-        self.logger.debug(f"Mesaj primit: {message[:100]}...")
+        if self._debug_enabled:
+            self.logger.debug("Mesaj primit: %.100s...", message)
         
         try:
-            # Verificăm dacă mesajul conține un cod QR pentru autentificare
-            if "\"type\":\"qr\"" in message:
-                data = json.loads(message.split(",", 1)[1])
-                if data.get("type") == "qr":
-                    qr_data = data["data"]
-                    self.logger.info("Cod QR primit pentru scanare")
-                    
-                    # Generăm și afișăm imaginea QR
-                    self._generate_and_display_qr(qr_data)
-                    
-                    # Notificăm aplicația prin callback
-                    if self.callbacks["qr_code"]:
-                        self.callbacks["qr_code"](qr_data)
+            # Parsăm o singură dată conținutul JSON din formatul tag,data
+            _, _, body = message.partition(",")
+            try:
+                data = json.loads(body)
+            except ValueError:
+                return
             
-            # Verificăm dacă este un mesaj normal
-            elif "\"type\":\"message\"" in message:
-                data = json.loads(message.split(",", 1)[1])
-                if self.callbacks["message"]:
-                    self.callbacks["message"](data)
+            # Alegem handler-ul după tipul mesajului
+            if isinstance(data, dict):
+                handler = self._handlers.get(data.get("type"))
+                if handler:
+                    await handler(data)
         
         except Exception as e:
             self.logger.error(f"Eroare la procesarea mesajului: {e}")
     
-    def _on_error(self, ws, error) -> None:
-        """Handler pentru erori WebSocket."""
-        self.logger.error(f"Eroare WebSocket: {error}")
+    async def _handle_qr(self, data: Dict[str, Any]) -> None:
+        """Handler pentru mesajele care conțin un cod QR pentru autentificare."""
+        qr_data = data["data"]
+        self.logger.info("Cod QR primit pentru scanare")
+        
+        # Rezolvăm toți cei care așteaptă următorul cod QR
+        waiters, self._qr_waiters = self._qr_waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(qr_data)
+        
+        # Generăm și afișăm imaginea QR
+        self._generate_and_display_qr(qr_data)
+        
+        # Notificăm aplicația prin callback
+        await self._notify("qr_code", qr_data)
+    
+    async def _handle_message(self, data: Dict[str, Any]) -> None:
+        """Handler pentru mesajele normale."""
+        await self._notify("message", data)
     
-    def _on_close(self, ws, close_status_code, close_reason) -> None:
+    def _on_close(self, close_status_code, close_reason) -> None:
         """Handler pentru închiderea conexiunii WebSocket."""
         self.logger.info(f"Conexiune WebSocket închisă. Cod: {close_status_code}, Motiv: {close_reason}")
         self.connected = False
-    
-    def _on_open(self, ws) -> None:
-        """Handler pentru deschiderea conexiunii WebSocket."""
-        self.logger.info("Conexiune WebSocket stabilită")
-        self.connected = True
         
-        # Trimitem mesajul de inițializare pentru a începe sesiunea
-        self._send_init_message()
+        if self._writer_task:
+            self._writer_task.cancel()
+            self._writer_task = None
+        
+        if self._consumer_task:
+            self._consumer_task.cancel()
+            self._consumer_task = None
+        
+        self.closed.set()
+    
+    async def _writer(self) -> None:
+        """Trimite cadrele din coadă, preluând la fiecare trezire tot ce s-a acumulat."""
+        while True:
+            batch = [await self._send_queue.get()]
+            while len(batch) < self.send_batch_size and not self._send_queue.empty():
+                batch.append(self._send_queue.get_nowait())
+            
+            try:
+                # Protocolul cere câte un cadru WebSocket pentru fiecare mesaj,
+                # dar scrierile consecutive ajung grupate în bufferul transportului
+                for frame in batch:
+                    # Octeții gata codificați pleacă tot ca un cadru text
+                    await self.ws.send(frame, text=True)
+                if self._debug_enabled:
+                    self.logger.debug("Trimise %d cadre", len(batch))
+            except Exception as e:
+                self.logger.error(f"Eroare la trimiterea mesajului: {e}")
     
-    def _send_init_message(self) -> None:
+    async def _send_init_message(self) -> None:
         """Trimite mesajul de inițializare pentru sesiunea WhatsApp Web."""
-        init_message = {
-            "clientId": self.client_id,
-            "connectType": "WIFI_UNKNOWN",
-            "connectReason": "USER_ACTIVATED",
-            "connectAttempt": 1,
-            "isNewLogin": True,
-            "passive": False,
-            "userAgent": WA_WEB_PARAMS["UA"],
-            "webVersion": WA_WEB_PARAMS["WA_VERSION"],
-            "browserName": "Chrome",
-            "browserVersion": "124.0.6367.91"
-        }
+        init_message = {"clientId": self.client_id, **_INIT_MESSAGE_TEMPLATE}
         
         # Trimitem mesajul serialized ca JSON cu prefix "admin"
-        self._send_json("admin", init_message)
+        await self._send_json("admin", init_message)
     
-    def _send_json(self, tag: str, data: Any) -> None:
+    async def _send_json(self, tag: str, data: Any) -> None:
         """
-        Trimite date JSON prin WebSocket.
+        Pune în coada de trimitere date JSON pentru WebSocket.
         
         Args:
             tag: Tag-ul mesajului (ex: "admin", "message")
@@ -158,17 +333,15 @@ class SimpleWhatsAppClient:
             self.logger.error("Nu există o conexiune WebSocket activă")
             return
             
-        # Serializăm datele ca JSON
+        # Serializăm datele ca JSON; json.dumps produce doar ASCII
         json_data = json.dumps(data, separators=(',', ':'))
         
-        # Construim mesajul complet
-        message = f"{tag},{json_data}"
+        # Construim mesajul complet direct ca octeți, codificați o singură dată
+        message = b"%s,%s" % (tag.encode('utf-8'), json_data.encode('ascii'))
         
-        try:
-            self.ws.send(message)
-            self.logger.debug(f"Mesaj trimis: {tag}")
-        except Exception as e:
-            self.logger.error(f"Eroare la trimiterea mesajului: {e}")
+        self._send_queue.put_nowait(message)
+        if self._debug_enabled:
+            self.logger.debug("Mesaj pus în coadă: %s", tag)
     
     def _generate_and_display_qr(self, qr_data: str) -> None:
         """
@@ -177,63 +350,46 @@ class SimpleWhatsAppClient:
         Args:
             qr_data: Datele pentru codul QR
         """
-        # Generăm codul QR
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=4,  # ERROR_CORRECT_H
-            box_size=10,
-            border=4
-        )
-        qr.add_data(qr_data)
-        qr.make(fit=True)
+        # Generăm codul QR, refolosind generatorul între reîmprospătări
+        if self._qr is None:
+            self._qr = qrcode.QRCode(
+                version=1,
+                error_correction=qrcode.constants.ERROR_CORRECT_H,
+                border=2
+            )
+        else:
+            self._qr.clear()
+        self._qr.add_data(qr_data)
+        self._qr.make(fit=True)
         
-        qr_image = qr.make_image(fill_color="black", back_color="white")
+        # Matricea de module (True = modul închis, cu margine) este deja
+        # exact ce trebuie randat, fără a trece printr-o imagine PIL
+        rows = [bytes(row) for row in self._qr.get_matrix()]
         
         # Afișăm codul QR în consolă în format ASCII
-        self._display_qr_terminal(qr_image)
+        self._display_qr_terminal(rows)
     
-    def _display_qr_terminal(self, qr_image: Image.Image) -> None:
+    def _display_qr_terminal(self, rows: List[bytes]) -> None:
         """
         Afișează un cod QR în terminal.
         
         Args:
-            qr_image: Imaginea codului QR
+            rows: Rândurile de module ale codului QR, fiecare byte fiind 0 sau 1
         """
-        # Convertim imaginea la alb/negru
-        qr_image = qr_image.convert('RGB')
-        width, height = qr_image.size
-        
         # Afișăm imaginea în terminal
         print("\n" + "-" * 50)
         print("SCANAȚI ACEST COD QR CU WHATSAPP PE TELEFON")
         print("-" * 50)
         
-        for y in range(0, height, 2):
-            line = ""
-            for x in range(width):
-                if y + 1 < height:
-                    upper_pixel = qr_image.getpixel((x, y))[0] < 128
-                    lower_pixel = qr_image.getpixel((x, y + 1))[0] < 128
-                    
-                    if upper_pixel and lower_pixel:
-                        line += "█"
-                    elif upper_pixel:
-                        line += "▀"
-                    elif lower_pixel:
-                        line += "▄"
-                    else:
-                        line += " "
-                else:
-                    pixel = qr_image.getpixel((x, y))[0] < 128
-                    line += "▀" if pixel else " "
-            print(line)
+        # Randăm modulele cu caractere half-block, două rânduri per linie
+        print("\n".join(render_half_blocks(rows)))
         
         print("-" * 50)
         print("Notă: Codul QR expiră după 20 de secunde.")
         print("Dacă nu reușiți să îl scanați, așteptați un nou cod.")
         print("-" * 50 + "\n")
     
-    def connect(self) -> None:
+    async def connect(self) -> None:
         """
         Inițiază conexiunea la serverele WhatsApp Web.
         
@@ -245,76 +401,67 @@ class SimpleWhatsAppClient:
             return
             
         self.logger.info("Conectare la serverele WhatsApp Web...")
+        self.closed.clear()
         
         try:
-            # Dezactivăm trace WebSocket pentru a reduce zgomotul în log
-            websocket.enableTrace(False)
-            
             # Simulăm sesiunea de browser prin efectuarea unui request HTTP inițial
-            session = requests.Session()
-            headers = {
-                "User-Agent": WA_WEB_PARAMS["UA"],
-                "Accept-Language": "en-US,en;q=0.9",
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-                "Cache-Control": "max-age=0"
-            }
+            # Sesiunea este refolosită la reconectare, evitând un nou handshake TLS
+            session = self._get_http_session()
             
-            # Facem un request inițial pentru a obține cookies
+            # Facem un request inițial pentru a obține cookies, fără a bloca bucla
             try:
-                resp = session.get(WA_WEB_PARAMS["WEBSITE_URL"], headers=headers)
+                resp = await asyncio.to_thread(session.get, WA_WEB_PARAMS["WEBSITE_URL"])
                 if resp.status_code != 200:
                     self.logger.warning(f"Acces inițial website returnat status {resp.status_code}")
             except Exception as e:
                 self.logger.warning(f"Eroare la request HTTP inițial: {e}")
             
-            # Generăm un ID de browser aleator
-            browser_id = uuid.uuid4().hex[:8]
-            
-            # Construim URL-ul cu toți parametrii necesari
-            browser_data = json.dumps({
-                "actual_browser": "Chrome",
-                "actual_version": "124.0.6367.91"
-            })
-            
-            ws_url = f"{WA_WEB_PARAMS['WS_URL']}?v={WA_WEB_PARAMS['WA_VERSION']}&browser={WA_WEB_PARAMS['BROWSER_VERSION']}&browser_data={browser_data}&clientId={self.client_id}&browser_id={browser_id}"
+            ws_url = self._ws_url
             
-            # Obținem și adăugăm cookie-urile din sesiunea HTTP
-            cookies = "; ".join([f"{k}={v}" for k, v in session.cookies.items()])
+            # Cookie jar-ul sesiunii alege cookie-urile valabile pentru URL-ul
+            # WebSocket, respectând Domain, Path și Secure
+            cookies = get_cookie_header(session.cookies, requests.Request("GET", ws_url))
             
-            # Construim headerele pentru WebSocket
-            ws_headers = {
-                "Origin": WA_WEB_PARAMS["ORIGIN"],
-                "User-Agent": WA_WEB_PARAMS["UA"]
-            }
+            # Construim headerele suplimentare pentru WebSocket
+            ws_headers = {}
             
             if cookies:
                 ws_headers["Cookie"] = cookies
             
             self.logger.info(f"Conectare WebSocket la: {ws_url}")
             
-            # Creăm conexiunea WebSocket
-            self.ws = websocket.WebSocketApp(
+            # Creăm conexiunea WebSocket direct pe bucla asyncio
+            self.ws = await websockets.connect(
                 ws_url,
-                header=ws_headers,
-                on_open=self._on_open,
-                on_message=self._on_message,
-                on_error=self._on_error,
-                on_close=self._on_close,
-                subprotocols=WA_WEB_PARAMS["WS_PROTOCOLS"]
+                additional_headers=ws_headers,
+                origin=WA_WEB_PARAMS["ORIGIN"],
+                user_agent_header=WA_WEB_PARAMS["UA"],
+                subprotocols=WA_WEB_PARAMS["WS_PROTOCOLS"],
+                ping_interval=25,
+                ping_timeout=10,
+                compression="deflate" if self.compression else None,
+                max_size=None
             )
+            self.logger.info("Conexiune WebSocket stabilită")
+            self.connected = True
             
-            # Rulăm WebSocket într-un thread separat
-            websocket_thread = threading.Thread(
-                target=lambda: self.ws.run_forever(ping_interval=25, ping_timeout=10)
-            )
-            websocket_thread.daemon = True
-            websocket_thread.start()
+            # Pornim task-ul care scrie cadrele din coadă
+            self._send_queue = asyncio.Queue()
+            self._writer_task = asyncio.create_task(self._writer())
+            
+            # Trimitem mesajul de inițializare pentru a începe sesiunea
+            await self._send_init_message()
+            
+            # Pornim citirea mesajelor primite și procesarea lor
+            self._receive_queue = asyncio.Queue(maxsize=self.receive_queue_size)
+            self._consumer_task = asyncio.create_task(self._consume())
+            self._listener_task = asyncio.create_task(self._listen())
             
         except Exception as e:
             self.logger.error(f"Eroare la conectare: {e}")
             self.connected = False
     
-    def disconnect(self) -> None:
+    async def disconnect(self) -> None:
         """Deconectare de la serverele WhatsApp Web."""
         if not self.connected:
             self.logger.warning("Clientul este deja deconectat")
@@ -324,17 +471,26 @@ class SimpleWhatsAppClient:
         
         try:
             if self.ws:
-                self.ws.close()
+                await self.ws.close()
+            
+            if self._listener_task:
+                await self._listener_task
+                self._listener_task = None
+            
+            if self._http:
+                self._http.close()
+                self._http = None
                 
             self.connected = False
             self.authenticated = False
+            self.closed.set()
             
         except Exception as e:
             self.logger.error(f"Eroare la deconectare: {e}")
     
-    def wait_for_qr_code(self, timeout: int = 60) -> bool:
+    async def wait_for_qr_code(self, timeout: int = 60) -> bool:
         """
-        Așteaptă primirea unui cod QR pentru autentificare.
+        Așteaptă primirea următorului cod QR pentru autentificare.
         
         Args:
             timeout: Timpul maxim de așteptare în secunde
@@ -342,20 +498,16 @@ class SimpleWhatsAppClient:
         Returns:
             bool: True dacă s-a primit un cod QR, False altfel
         """
-        qr_event = threading.Event()
-        
-        def on_qr_update(qr_data):
-            qr_event.set()
-        
-        # Înregistrăm callback-ul temporar
-        old_callback = self.callbacks.get("qr_code")
-        self.callbacks["qr_code"] = on_qr_update
-        
-        # Așteptăm evenimentul sau timeout
-        result = qr_event.wait(timeout)
-        
-        # Restaurăm callback-ul original
-        self.callbacks["qr_code"] = old_callback
+        # Fiecare apelant primește propriul Future, rezolvat la sosirea codului QR
+        waiter = asyncio.get_running_loop().create_future()
+        self._qr_waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+            result = True
+        except asyncio.TimeoutError:
+            result = False
+            if waiter in self._qr_waiters:
+                self._qr_waiters.remove(waiter)
         
         if result:
             self.logger.info("Cod QR primit cu succes!")
@@ -365,7 +517,7 @@ class SimpleWhatsAppClient:
         return result
 
 
-def main():
+async def main():
     """Funcția principală pentru demonstrarea clientului simplificat."""
     # Configurare nivel logging
     log_level = logging.INFO
@@ -391,29 +543,34 @@ def main():
     try:
         print("\n=== Demonstrație Client Simplificat WhatsApp Web ===")
         print(">>> Conectare la serverele WhatsApp...")
-        client.connect()
+        await client.connect()
         
         # Așteptăm primirea codului QR
         print(">>> Așteptăm primirea codului QR...")
-        client.wait_for_qr_code(timeout=30)
+        await client.wait_for_qr_code(timeout=30)
         
         # Menținem conexiunea activă pentru a permite scanarea QR
         print("\n>>> Conexiune activă. Apăsați Ctrl+C pentru a încheia.")
         print(">>> Scanați codul QR cu aplicația WhatsApp de pe telefonul dvs.\n")
         
-        # Bucla principală
-        while True:
-            time.sleep(1)
+        # Așteptăm închiderea conexiunii fără a trezi periodic bucla
+        await client.closed.wait()
             
-    except KeyboardInterrupt:
+    except asyncio.CancelledError:
         print("\n>>> Întrerupere de la tastatură. Deconectare...")
     except Exception as e:
         print(f">>> Eroare: {e}")
     finally:
         # Deconectare la final
         if client:
-            client.disconnect()
+            await client.disconnect()
         print(">>> Deconectat de la WhatsApp.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        if uvloop is not None:
+            uvloop.run(main())
+        else:
+            asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
\ No newline at end of file
@@ -7,10 +7,17 @@ autentificarea folosind fie codul QR, fie codul de asociere (pairing code).
 """
 
 import argparse
+import asyncio
 import logging
 import os
+import signal
 import sys
-import time
+
+# uvloop este opțional; fără el folosim bucla asyncio implicită
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
 # Adăugăm directorul părinte în calea de căutare pentru a putea importa modulul wawspy
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -35,7 +42,59 @@ def on_disconnected(info):
     """Callback pentru deconectare."""
     print(f"\nDeconectat de la WhatsApp Web. Motiv: {info.get('reason')}\n")
 
-def main():
+async def run_session(client, args, stop: asyncio.Event) -> None:
+    """Așteaptă conexiunea, autentifică și trimite mesajul de test; semnalează oprirea la eșec."""
+    if not await client.wait_for_connection(30):
+        print("Nu s-a putut conecta la serverele WhatsApp Web în timpul specificat")
+        stop.set()
+        return
+        
+    print("Conexiune stabilită cu serverele WhatsApp Web!")
+    
+    # Alegem metoda de autentificare în funcție de argumentele primite
+    if args.phone:
+        # Autentificare cu pairing code
+        print(f"Solicitare cod de asociere pentru numărul {args.phone}...")
+        result = client.authenticate_with_pairing_code(args.phone)
+        print(result)
+        
+        # Solicităm codul de asociere de la utilizator, fără a bloca bucla
+        pairing_code = await asyncio.to_thread(input, "Introduceți codul de asociere primit pe telefon (6 cifre): ")
+        print(f"Verificare cod de asociere: {pairing_code}")
+        
+        if await client.verify_pairing_code(pairing_code):
+            print("Autentificare reușită cu codul de asociere!")
+        else:
+            print("Autentificare eșuată. Cod de asociere invalid.")
+            stop.set()
+            return
+    else:
+        # Autentificare cu cod QR
+        print("Inițiere autentificare cu cod QR...")
+        client.authenticate_with_qr()
+    
+    # Așteptăm autentificarea
+    if not await client.wait_for_authentication(120):
+        print("Autentificare eșuată sau timeout.")
+        stop.set()
+        return
+        
+    print("Autentificare reușită!")
+    
+    # Testăm trimiterea unui mesaj dacă suntem autentificați
+    if client.is_authenticated:
+        recipient = await asyncio.to_thread(input, "\nIntroduceți numărul de telefon pentru a trimite un mesaj de test (ex: +40123456789): ")
+        message = "Acesta este un mesaj de test trimis prin biblioteca wawspy!"
+        
+        try:
+            result = await client.send_message(recipient, message)
+            print(f"Mesaj trimis cu succes: {result}")
+        except Exception as e:
+            print(f"Eroare la trimiterea mesajului: {e}")
+    
+    print("\nConexiune activă. Apăsați Ctrl+C pentru a încheia.")
+
+async def main():
     """Funcția principală care demonstrează conexiunea la WhatsApp Web."""
     
     # Configurare argumente linie de comandă
@@ -50,85 +109,58 @@ def main():
     # Inițializare client WhatsApp
     client = WAClient(log_level=log_level)
     
+    # Evenimentul de oprire, setat de Ctrl+C sau de deconectarea clientului
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    try:
+        loop.add_signal_handler(signal.SIGINT, stop.set)
+    except NotImplementedError:
+        # Windows nu suportă add_signal_handler; rămâne KeyboardInterrupt implicit
+        pass
+    
+    def on_disconnected_stop(info):
+        on_disconnected(info)
+        stop.set()
+    
     # Înregistrare callbacks
     client.register_callback("qr_code", on_qr_code)
     client.register_callback("connected", on_connected)
     client.register_callback("message", on_message)
-    client.register_callback("disconnected", on_disconnected)
+    client.register_callback("disconnected", on_disconnected_stop)
     
     try:
         print("Conectare la serverele WhatsApp Web...")
         
-        # Pornire thread pentru conexiune
-        import threading
-        connection_thread = threading.Thread(target=client.connect)
-        connection_thread.daemon = True
-        connection_thread.start()
+        # connect() revine după stabilirea conexiunii; citirea continuă pe buclă
+        await client.connect()
         
-        # Așteptăm stabilirea conexiunii
-        if not client.wait_for_connection(timeout=30):
-            print("Nu s-a putut conecta la serverele WhatsApp Web în timpul specificat")
-            return
-            
-        print("Conexiune stabilită cu serverele WhatsApp Web!")
-        
-        # Alegem metoda de autentificare în funcție de argumentele primite
-        if args.phone:
-            # Autentificare cu pairing code
-            print(f"Solicitare cod de asociere pentru numărul {args.phone}...")
-            result = client.authenticate_with_pairing_code(args.phone)
-            print(result)
-            
-            # Solicităm codul de asociere de la utilizator
-            pairing_code = input("Introduceți codul de asociere primit pe telefon (6 cifre): ")
-            print(f"Verificare cod de asociere: {pairing_code}")
+        async with asyncio.TaskGroup() as tg:
+            session = tg.create_task(run_session(client, args, stop))
             
-            if client.verify_pairing_code(pairing_code):
-                print("Autentificare reușită cu codul de asociere!")
-            else:
-                print("Autentificare eșuată. Cod de asociere invalid.")
-                return
-        else:
-            # Autentificare cu cod QR
-            print("Inițiere autentificare cu cod QR...")
-            client.authenticate_with_qr()
-        
-        # Așteptăm autentificarea
-        if not client.wait_for_authentication(timeout=120):
-            print("Autentificare eșuată sau timeout.")
-            return
+            # Menținem conexiunea activă până la oprire, fără treziri periodice
+            await stop.wait()
+            print("\nÎnchidere. Deconectare...")
+            session.cancel()
+            if client.is_connected:
+                await client.disconnect()
             
-        print("Autentificare reușită!")
-        
-        # Testăm trimiterea unui mesaj dacă suntem autentificați
-        if client.is_authenticated:
-            recipient = input("\nIntroduceți numărul de telefon pentru a trimite un mesaj de test (ex: +40123456789): ")
-            message = "Acesta este un mesaj de test trimis prin biblioteca wawspy!"
-            
-            try:
-                result = client.send_message(recipient, message)
-                print(f"Mesaj trimis cu succes: {result}")
-            except Exception as e:
-                print(f"Eroare la trimiterea mesajului: {e}")
-        
-        # Menținem conexiunea activă pentru a primi mesaje
-        print("\nConexiune activă. Apăsați Ctrl+C pentru a încheia.")
-        while client.is_connected:
-            time.sleep(1)
-            
-    except WAConnectionError as e:
-        print(f"Eroare de conexiune: {e}")
-    except WAAuthenticationError as e:
-        print(f"Eroare de autentificare: {e}")
-    except KeyboardInterrupt:
-        print("\nÎntrerupere de la tastatură. Deconectare...")
-    except Exception as e:
-        print(f"Eroare neașteptată: {e}")
+    except* WAConnectionError as eg:
+        print(f"Eroare de conexiune: {eg.exceptions[0]}")
+    except* WAAuthenticationError as eg:
+        print(f"Eroare de autentificare: {eg.exceptions[0]}")
+    except* Exception as eg:
+        print(f"Eroare neașteptată: {eg.exceptions[0]}")
     finally:
         # Deconectare la final
         if client.is_connected:
-            client.disconnect()
-            print("Deconectat de la WhatsApp Web.")
+            await client.disconnect()
+        print("Deconectat de la WhatsApp Web.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        if uvloop is not None:
+            uvloop.run(main())
+        else:
+            asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
\ No newline at end of file
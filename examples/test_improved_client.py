@@ -5,10 +5,11 @@ cu clientul îmbunătățit cu emulare completă de browser.
 """
 
 import argparse
+import asyncio
 import logging
 import os
+import signal
 import sys
-import time
 
 # Adăugăm directorul părinte în calea de căutare
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -43,7 +44,14 @@ def on_disconnected(info):
     """Callback pentru deconectare."""
     print(f"\n>>> Deconectat de la WhatsApp. Motiv: {info}")
 
-def main():
+async def request_pairing(client, connecting: asyncio.Task, phone: str) -> None:
+    """Solicită codul de asociere după ce conexiunea a fost inițiată."""
+    await connecting
+    print(f">>> Solicitare cod de asociere pentru numărul {phone}...")
+    await asyncio.sleep(5)  # Așteptăm stabilirea conexiunii
+    await asyncio.to_thread(client.request_pairing_code, phone)
+
+async def main():
     """Funcția principală pentru testarea clientului real."""
     
     # Configurare argumente linie de comandă
@@ -58,42 +66,57 @@ def main():
     # Inițializare client WhatsApp real
     client = WAClient(log_level=log_level)
     
+    # Evenimentul de oprire, setat de Ctrl+C sau de deconectarea clientului
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    try:
+        loop.add_signal_handler(signal.SIGINT, stop.set)
+    except NotImplementedError:
+        # Windows nu suportă add_signal_handler; rămâne KeyboardInterrupt implicit
+        pass
+    
+    def on_disconnected_stop(info):
+        on_disconnected(info)
+        loop.call_soon_threadsafe(stop.set)
+    
     # Înregistrare callbacks
     client.register_callback("qr_code", on_qr_code)
     client.register_callback("connection_update", on_connection_update)
     client.register_callback("connected", on_connected)
     client.register_callback("message", on_message)
-    client.register_callback("disconnected", on_disconnected)
+    client.register_callback("disconnected", on_disconnected_stop)
     
     try:
         print("\n=== Testare conectare la serverele WhatsApp folosind emulare browser ===")
         print(">>> Conectare la serverele WhatsApp...")
-        client.connect()
-        
-        # Dacă s-a specificat un număr de telefon, folosim autentificarea cu pairing code
-        if args.phone:
-            print(f">>> Solicitare cod de asociere pentru numărul {args.phone}...")
-            time.sleep(5)  # Așteptăm stabilirea conexiunii
-            client.request_pairing_code(args.phone)
-        
-        # Menținem conexiunea activă
-        print("\n>>> Conexiune activă. Apăsați Ctrl+C pentru a încheia.")
-        print(">>> Așteptând evenimente de la serverele WhatsApp...\n")
         
-        # Bucla principală
-        while True:
-            time.sleep(1)
+        async with asyncio.TaskGroup() as tg:
+            # connect() face request-ul HTTP inițial blocant, deci rulează într-un thread
+            connecting = tg.create_task(asyncio.to_thread(client.connect))
             
-    except KeyboardInterrupt:
-        print("\n>>> Întrerupere de la tastatură. Deconectare...")
-    except Exception as e:
-        print(f">>> Eroare: {e}")
+            # Dacă s-a specificat un număr de telefon, folosim autentificarea cu pairing code
+            if args.phone:
+                tg.create_task(request_pairing(client, connecting, args.phone))
+            
+            # Menținem conexiunea activă
+            print("\n>>> Conexiune activă. Apăsați Ctrl+C pentru a încheia.")
+            print(">>> Așteptând evenimente de la serverele WhatsApp...\n")
+            
+            # Așteptăm oprirea, fără treziri periodice
+            await stop.wait()
+            print("\n>>> Întrerupere. Deconectare...")
+            
+    except* Exception as eg:
+        print(f">>> Eroare: {eg.exceptions[0]}")
         import traceback
-        traceback.print_exc()
+        traceback.print_exception(eg)
     finally:
         # Deconectare la final
         client.disconnect()
         print(">>> Deconectat de la WhatsApp.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
\ No newline at end of file
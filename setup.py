@@ -30,4 +30,7 @@ setup(
         "qrcode",
         "requests",
     ],
+    extras_require={
+        "speed": ["uvloop>=0.19; platform_system != 'Windows'", "orjson>=3.9", "pycryptodomex>=3.19"],
+    },
 )
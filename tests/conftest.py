@@ -0,0 +1,70 @@
+"""
+Shared test fakes for wawspy.
+
+Plain stand-ins for the WebSocket layer and for callbacks. They are
+cheaper to build than MagicMock and are patched in through monkeypatch.
+"""
+
+import pytest
+
+class FakeWebSocket:
+    """Records what the code under test does with its WebSocket."""
+    
+    def __init__(self):
+        self.sent = []
+        self.closed = False
+        self.run_forever_called = False
+        self.on_open = None
+    
+    def send(self, *args, **kwargs):
+        self.sent.append(args)
+    
+    def close(self, *args, **kwargs):
+        self.closed = True
+    
+    def run_forever(self, *args, **kwargs):
+        # Like websocket.WebSocketApp, report the open connection from run_forever
+        self.run_forever_called = True
+        if self.on_open:
+            self.on_open(self)
+
+class FakeWebSocketApp:
+    """Stands in for websocket.WebSocketApp, always returning the same FakeWebSocket."""
+    
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.calls = []
+    
+    def __call__(self, *args, **kwargs):
+        self.calls.append((args, kwargs))
+        self.websocket.on_open = kwargs.get("on_open")
+        return self.websocket
+    
+    @property
+    def called(self):
+        return bool(self.calls)
+
+class CallRecorder:
+    """Callable that records its calls, used in place of MagicMock callbacks."""
+    
+    def __init__(self):
+        self.calls = []
+    
+    def __call__(self, *args, **kwargs):
+        self.calls.append((args, kwargs))
+    
+    @property
+    def called(self):
+        return bool(self.calls)
+
+@pytest.fixture
+def fake_websocket():
+    """Create a fake WebSocket for testing."""
+    return FakeWebSocket()
+
+@pytest.fixture
+def fake_websocket_app(monkeypatch, fake_websocket):
+    """Replace websocket.WebSocketApp used by wawspy.connection with a fake factory."""
+    factory = FakeWebSocketApp(fake_websocket)
+    monkeypatch.setattr("wawspy.connection.websocket.WebSocketApp", factory)
+    return factory
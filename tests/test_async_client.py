@@ -0,0 +1,106 @@
+"""
+Tests for the asyncio WAClient of wawspy, against a local WebSocket server.
+"""
+
+import asyncio
+import logging
+
+import websockets
+
+import wawspy.client as wa_client
+from wawspy.client import WAClient
+from wawspy.exceptions import WAConnectionError
+
+
+async def _serve(handler):
+    """Start a local server and point WAClient at it"""
+    server = await websockets.serve(handler, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, f"ws://127.0.0.1:{port}"
+
+
+async def _echo_after_init(ws):
+    """Server handler: read the init frame, send one message, then stay open"""
+    await ws.recv()
+    await ws.send('x1,{"hello":1}')
+    async for _ in ws:
+        pass
+
+
+def test_disconnect_from_message_callback(monkeypatch, caplog):
+    """Test that disconnect() called from a callback does not wait on itself"""
+    async def scenario():
+        server, url = await _serve(_echo_after_init)
+        monkeypatch.setattr(wa_client, "WA_WS_URL", url)
+        client = WAClient(log_level=logging.WARNING)
+        done = asyncio.Event()
+
+        async def on_message(message):
+            await client.disconnect()
+            done.set()
+
+        client.register_callback("message", on_message)
+        async with server:
+            await client.connect()
+            reader_task = client._reader_task
+            await asyncio.wait_for(done.wait(), 5)
+            await asyncio.wait_for(reader_task, 5)
+
+        return client.is_connected
+
+    assert asyncio.run(scenario()) is False
+    assert not [r for r in caplog.records if r.levelno >= logging.ERROR]
+
+
+def test_disconnect_with_dead_writer(monkeypatch):
+    """Test that disconnect() does not hang when queued frames cannot be sent"""
+    monkeypatch.setattr(wa_client, "DISCONNECT_DRAIN_TIMEOUT", 0.1)
+
+    async def scenario():
+        server, url = await _serve(_echo_after_init)
+        monkeypatch.setattr(wa_client, "WA_WS_URL", url)
+        client = WAClient(log_level=logging.WARNING)
+        async with server:
+            await client.connect()
+
+            # Frames that nobody will send, and a writer that is stuck
+            client._writer_task.cancel()
+            client._writer_task = asyncio.create_task(asyncio.sleep(60))
+            await client._send_frame(b"x2,{}")
+
+            await asyncio.wait_for(client.disconnect(), 5)
+        return client.is_connected
+
+    assert asyncio.run(scenario()) is False
+
+
+def test_failed_connect_releases_connection(monkeypatch):
+    """Test that a connect() failing in _on_open closes the socket and writer"""
+    async def scenario():
+        server, url = await _serve(_echo_after_init)
+        monkeypatch.setattr(wa_client, "WA_WS_URL", url)
+        client = WAClient(log_level=logging.WARNING)
+        opened = {}
+
+        async def broken_open(ws):
+            opened["ws"] = ws
+            opened["writer"] = client._writer_task
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr(client, "_on_open", broken_open)
+        async with server:
+            try:
+                await client.connect()
+            except WAConnectionError:
+                pass
+            else:
+                raise AssertionError("connect() should have failed")
+        return client, opened
+
+    client, opened = asyncio.run(scenario())
+    assert opened["ws"].state is websockets.State.CLOSED
+    assert opened["writer"].done()
+    assert client.ws is None
+    assert client._writer_task is None
+    assert client._send_queue is None
+    assert not client.is_connected
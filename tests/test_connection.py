@@ -5,54 +5,39 @@ Tests for the WebSocket connection module of wawspy.
 import pytest
 import time
 import json
-from unittest.mock import MagicMock, patch
+import threading
 
 from wawspy.connection import WAConnection
 from wawspy.errors import WAConnectionError
 
+from .conftest import CallRecorder, FakeWebSocket
+
 class TestWAConnection:
     """Tests for the WAConnection class."""
     
     @pytest.fixture
     def connection(self):
         """Create a WAConnection instance for testing."""
-        return WAConnection()
+        conn = WAConnection()
+        yield conn
+        conn.disconnect()
     
-    @pytest.fixture
-    def mock_websocket(self):
-        """Create a mock WebSocket for testing."""
-        mock_ws = MagicMock()
-        mock_ws.run_forever = MagicMock()
-        mock_ws.send = MagicMock()
-        mock_ws.close = MagicMock()
-        return mock_ws
-    
-    @patch('wawspy.connection.websocket.WebSocketApp')
-    def test_connect(self, mock_websocket_app, connection, mock_websocket):
+    def test_connect(self, connection, fake_websocket, fake_websocket_app):
         """Test connecting to WhatsApp Web."""
-        # Setup mock
-        mock_websocket_app.return_value = mock_websocket
-        
-        # Make the _on_open method get called to set connected = True
-        def side_effect(*args, **kwargs):
-            connection._on_open(mock_websocket)
-            return mock_websocket
-            
-        mock_websocket_app.side_effect = side_effect
-        
-        # Test connect
+        # Test connect; the fake fires on_open from run_forever
         result = connection.connect()
         
         # Verify
         assert result is True
         assert connection.connected is True
-        assert mock_websocket_app.called
-        assert mock_websocket.run_forever.called
+        assert fake_websocket_app.called
+        assert fake_websocket.run_forever_called
+        assert fake_websocket.sent  # init message
     
-    def test_disconnect(self, connection):
+    def test_disconnect(self, connection, fake_websocket):
         """Test disconnecting from WhatsApp Web."""
         # Setup
-        connection.ws = MagicMock()
+        connection.ws = fake_websocket
         connection.connected = True
         
         # Test disconnect
@@ -60,7 +45,77 @@ class TestWAConnection:
         
         # Verify
         assert connection.connected is False
-        assert connection.ws.close.called
+        assert fake_websocket.closed
+    
+    def test_reconnect_backoff_is_jittered(self, connection, monkeypatch):
+        """Test that reconnect delays stay within the decorrelated jitter bounds."""
+        # Setup
+        delays = []
+        monkeypatch.setattr(connection._closing, "wait", lambda t: delays.append(t) or False)
+        monkeypatch.setattr(connection, "connect", lambda: False)
+        
+        # Test
+        for _ in range(connection.max_reconnect_attempts):
+            connection.reconnect()
+        
+        # Verify
+        assert len(delays) == connection.max_reconnect_attempts
+        previous = connection.reconnect_interval
+        for delay in delays:
+            assert connection.reconnect_interval <= delay <= min(connection.max_reconnect_interval, previous * 3)
+            previous = delay
+        assert connection.reconnect() is False
+    
+    def test_disconnect_cancels_reconnect_wait(self, connection, monkeypatch):
+        """Test that disconnect() interrupts a reconnect waiting on its backoff."""
+        # Setup
+        connect = CallRecorder()
+        monkeypatch.setattr(connection, "connect", connect)
+        connection.reconnect_interval = connection._prev_delay = 30
+        results = []
+        worker = threading.Thread(target=lambda: results.append(connection.reconnect()))
+        worker.start()
+        
+        # Test
+        time.sleep(0.05)
+        connection.disconnect()
+        worker.join(timeout=2)
+        
+        # Verify
+        assert not worker.is_alive()
+        assert results == [False]
+        assert not connect.called
+    
+    def test_on_close_reconnects_off_socket_thread(self, connection, monkeypatch):
+        """Test that _on_close does not run the reconnect backoff on its own thread."""
+        # Setup
+        done = threading.Event()
+        threads = []
+        def reconnect():
+            threads.append(threading.current_thread())
+            done.set()
+        monkeypatch.setattr(connection, "reconnect", reconnect)
+        connection.connected = True
+        
+        # Test
+        connection._on_close(None, 1006, "abnormal closure")
+        
+        # Verify
+        assert done.wait(2)
+        assert threads[0] is not threading.current_thread()
+    
+    def test_adapt_intervals_from_lifetimes(self, connection):
+        """Test that short-lived connections tighten keepalive and reconnect intervals."""
+        # Setup: connections that dropped after about 4 seconds
+        connection._lifetimes.extend([4.0] * 10)
+        
+        # Test
+        connection._adapt_intervals()
+        
+        # Verify
+        assert connection.keepalive_interval == 5
+        assert connection.keepalive_timeout < connection.keepalive_interval
+        assert connection.reconnect_interval == 1
     
     def test_send_message_not_connected(self, connection):
         """Test sending a message when not connected throws error."""
@@ -71,24 +126,81 @@ class TestWAConnection:
         with pytest.raises(WAConnectionError):
             connection.send_message({"test": "message"})
     
-    @patch('wawspy.connection.websocket.WebSocketApp')
-    def test_send_message(self, mock_websocket_app, connection, mock_websocket):
+    def test_send_message(self, connection, fake_websocket):
         """Test sending a message."""
         # Setup
-        connection.ws = mock_websocket
+        connection.ws = fake_websocket
         connection.connected = True
         
         # Test
         tag = connection.send_message({"test": "message"})
         
         # Verify
-        assert mock_websocket.send.called
+        assert fake_websocket.sent
         assert isinstance(tag, str)
     
+    def test_send_message_concurrent_failure(self, connection):
+        """Test that a send failure reaches the caller whose frame failed."""
+        # Setup: the first frame is held until the second is queued behind
+        # it, and the second frame fails on the socket
+        first_sending = threading.Event()
+        release_first = threading.Event()
+        
+        class FlakySocket(FakeWebSocket):
+            def send(self, message):
+                if message.startswith(b"first,"):
+                    first_sending.set()
+                    release_first.wait(5)
+                    self.sent.append(message)
+                else:
+                    raise ConnectionError("socket closed")
+        
+        connection.ws = FlakySocket()
+        connection.connected = True
+        results = {}
+        
+        def sender(tag):
+            try:
+                connection.send_message({"test": "message"}, tag=tag)
+                results[tag] = "sent"
+            except WAConnectionError:
+                results[tag] = "error"
+        
+        # Test
+        first = threading.Thread(target=sender, args=("first",))
+        first.start()
+        assert first_sending.wait(5)
+        second = threading.Thread(target=sender, args=("second",))
+        second.start()
+        deadline = time.monotonic() + 5
+        while not connection._tx_queue and time.monotonic() < deadline:
+            time.sleep(0.001)
+        release_first.set()
+        first.join(5)
+        second.join(5)
+        
+        # Verify
+        assert results == {"first": "sent", "second": "error"}
+        assert not connection._tx_queue
+    
+    def test_send_request(self, connection, fake_websocket):
+        """Test that send_request returns the response with the same tag."""
+        # Setup: the fake server answers every frame immediately
+        connection.ws = fake_websocket
+        connection.connected = True
+        fake_websocket.send = lambda message: connection._on_message(None, b'req1,{"ok": true}')
+        
+        # Test
+        response = connection.send_request({"test": "message"}, tag="req1", timeout=1)
+        
+        # Verify
+        assert response == {"ok": True}
+        assert not connection.pending_requests
+    
     def test_on_message_success(self, connection):
         """Test handling a success message."""
         # Setup
-        connection.on_connect_callback = MagicMock()
+        connection.on_connect_callback = CallRecorder()
         
         # Test
         data = {"status": 200, "clientToken": "test_token", "serverToken": "server_token"}
@@ -100,10 +212,55 @@ class TestWAConnection:
         assert connection.server_token == "server_token"
         assert connection.on_connect_callback.called
     
+    def test_on_message_dispatched_off_read_thread(self, connection):
+        """Test that message callbacks run on the dispatch worker."""
+        # Setup
+        threads = []
+        connection.on_message_callback = lambda tag, data: threads.append(
+            (tag, data, threading.current_thread())
+        )
+        
+        # Test
+        connection._start_dispatcher()
+        connection._on_message(None, 'tag1,{"key": "value"}')
+        connection._event_q.join()
+        
+        # Verify
+        assert threads == [("tag1", {"key": "value"}, connection._worker)]
+    
+    def test_on_message_bytes_frame(self, connection):
+        """Test handling a frame delivered as raw bytes."""
+        # Setup
+        received = []
+        connection.on_message_callback = lambda tag, data: received.append((tag, data))
+        
+        # Test
+        connection._start_dispatcher()
+        connection._on_message(None, b'tag2,{"key": "value"}')
+        connection._event_q.join()
+        
+        # Verify
+        assert received == [("tag2", {"key": "value"})]
+    
+    def test_disconnect_stops_dispatch_worker(self, connection):
+        """Test that disconnect() stops the dispatch worker thread."""
+        # Setup
+        connection._start_dispatcher()
+        worker = connection._worker
+        assert worker.is_alive()
+        
+        # Test
+        connection.disconnect()
+        worker.join(timeout=2)
+        
+        # Verify
+        assert not worker.is_alive()
+        assert connection._worker is None
+    
     def test_register_callback(self, connection):
         """Test registering callbacks."""
         # Setup
-        mock_callback = MagicMock()
+        mock_callback = CallRecorder()
         
         # Test
         connection.register_callback(
@@ -118,3 +275,10 @@ class TestWAConnection:
         assert connection.on_connect_callback == mock_callback
         assert connection.on_close_callback == mock_callback
         assert connection.on_error_callback == mock_callback
+    
+    def test_register_callback_unknown_event(self, connection):
+        """Test that a misspelled event name is rejected instead of ignored."""
+        # Test & verify
+        with pytest.raises(TypeError):
+            connection.register_callback(on_mesage=CallRecorder())
+        assert connection.on_message_callback is None
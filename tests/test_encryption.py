@@ -0,0 +1,131 @@
+"""
+Tests for the wawspy encryption module.
+"""
+
+import hashlib
+import hmac
+import os
+
+import pytest
+
+from wawspy.encryption import WAEncryption, _hkdf_sha256, _pkcs7_pad, _pkcs7_unpad
+
+
+@pytest.fixture
+def encryption():
+    """Create a WAEncryption instance with derived session keys"""
+    enc = WAEncryption()
+    enc.generate_keys()
+    enc.compute_shared_key(enc.public_key)
+    enc.derive_session_keys()
+    return enc
+
+
+def test_compute_hmac_with_keys_set_directly():
+    """Test compute_hmac when mac_key is set without derive_session_keys"""
+    enc = WAEncryption()
+    enc.mac_key = os.urandom(16)
+
+    expected = hmac.new(enc.mac_key, b"data", hashlib.sha256).digest()
+    assert enc.compute_hmac(b"data") == expected
+    assert enc.verify_hmac(b"data", expected)
+
+
+def test_compute_hmac_follows_mac_key_changes(encryption):
+    """Test that a new mac_key is picked up by compute_hmac"""
+    encryption.compute_hmac(b"data")
+    encryption.mac_key = os.urandom(16)
+
+    expected = hmac.new(encryption.mac_key, b"data", hashlib.sha256).digest()
+    assert encryption.compute_hmac(b"data") == expected
+
+
+@pytest.mark.parametrize("legacy_cbc", [False, True])
+def test_message_roundtrip(legacy_cbc):
+    """Test encrypting and decrypting a message in both formats"""
+    enc = WAEncryption(legacy_cbc=legacy_cbc)
+    enc.generate_keys()
+    enc.compute_shared_key(enc.public_key)
+    enc.derive_session_keys()
+
+    for message in (b"", b"hello", os.urandom(1000)):
+        assert enc.decrypt_message(enc.encrypt_message(message)) == message
+
+
+@pytest.mark.parametrize("legacy_cbc", [False, True])
+def test_message_tampering_is_rejected(encryption, legacy_cbc):
+    """Test that a modified ciphertext or tag fails authentication"""
+    encryption.legacy_cbc = legacy_cbc
+    encrypted = encryption.encrypt_message(b"hello world")
+
+    for index in (0, len(encrypted) // 2, len(encrypted) - 1):
+        tampered = bytearray(encrypted)
+        tampered[index] ^= 1
+        with pytest.raises(ValueError):
+            encryption.decrypt_message(bytes(tampered))
+
+
+def test_message_roundtrip_with_keys_set_directly():
+    """Test GCM encryption when keys are set without derive_session_keys"""
+    enc = WAEncryption()
+    enc.enc_key = os.urandom(32)
+    enc.mac_key = os.urandom(16)
+
+    assert enc.decrypt_message(enc.encrypt_message(b"hello")) == b"hello"
+
+    old = enc.encrypt_message(b"hello")
+    enc.enc_key = os.urandom(32)
+    with pytest.raises(ValueError):
+        enc.decrypt_message(old)
+
+
+def test_hkdf_rfc5869_vector():
+    """Test HKDF-SHA256 against RFC 5869 test case 1"""
+    okm = _hkdf_sha256(
+        bytes.fromhex("0b" * 22),
+        42,
+        salt=bytes.fromhex("000102030405060708090a0b0c"),
+        info=bytes.fromhex("f0f1f2f3f4f5f6f7f8f9")
+    )
+    assert okm == bytes.fromhex(
+        "3cb25f25faacd57a90434f64d0362f2a2d2d0a90cf1a5a4c5db02d56ecc4c5bf"
+        "34007208d5b887185865"
+    )
+
+
+@pytest.mark.parametrize("length", [0, 1, 15, 16, 17, 31, 32])
+def test_pkcs7_roundtrip(length):
+    """Test that padding and unpadding restores the data"""
+    data = os.urandom(length)
+    padded = _pkcs7_pad(data)
+    assert len(padded) % 16 == 0 and len(padded) > length
+    assert _pkcs7_unpad(padded) == data
+
+
+@pytest.mark.parametrize("padded", [
+    b"",                                  # empty
+    b"a" * 15,                            # not a whole block
+    b"a" * 15 + b"\x00",                  # pad length 0
+    b"a" * 15 + b"\x11",                  # pad length > 16
+    b"a" * 14 + b"\x01\x02",              # bad pad byte
+    b"a" * 12 + b"\x04\x04\x05\x04",      # bad pad byte inside the padding
+])
+def test_pkcs7_unpad_invalid(padded):
+    """Test that malformed padding is rejected"""
+    with pytest.raises(ValueError):
+        _pkcs7_unpad(padded)
+
+
+def test_x25519_key_agreement():
+    """Test that two parties derive the same shared and session keys"""
+    alice = WAEncryption()
+    bob = WAEncryption()
+    alice.generate_keys()
+    bob.generate_keys()
+
+    assert len(alice.public_key) == 32 and alice.public_key != bob.public_key
+    assert alice.compute_shared_key(bob.public_key) == bob.compute_shared_key(alice.public_key)
+    assert alice.derive_session_keys() == bob.derive_session_keys()
+
+    # A session encrypted by one side decrypts on the other
+    assert bob.decrypt_message(alice.encrypt_message(b"hello")) == b"hello"
@@ -3,11 +3,14 @@ Tests for the media handling module of wawspy.
 """
 
 import pytest
+import base64
+import hashlib
+import io
 import os
 import tempfile
 from unittest.mock import MagicMock, patch
 
-from wawspy.media import WAMedia
+from wawspy.media import WAMedia, _decrypt_media_stream, _encrypt_media_stream
 from wawspy.errors import WAMediaError
 
 class TestWAMedia:
@@ -170,3 +173,131 @@ class TestWAMedia:
         assert result["mediaInfo"]["mediaUrl"] == "https://example.com/document.pdf"
         assert result["mediaInfo"]["mimetype"] == "application/pdf"
         assert result["mediaInfo"]["fileName"] == "test.pdf"
+
+    
+    def _encrypted_blob(self, plaintext, media_key, media_type="image"):
+        """Encrypt plaintext the way the media servers store it."""
+        out = io.BytesIO()
+        _encrypt_media_stream(io.BytesIO(plaintext), out, media_key, media_type)
+        return out.getvalue()
+    
+    def _fake_get(self, body):
+        """Build a requests.get replacement streaming body in small chunks."""
+        response = MagicMock()
+        response.status_code = 200
+        response.iter_content.side_effect = lambda chunk_size: (
+            body[i:i + 7] for i in range(0, len(body), 7)
+        )
+        response.__enter__.return_value = response
+        return MagicMock(return_value=response)
+    
+    def test_download_media_decrypts(self, media_handler, tmp_path):
+        """Test downloading and decrypting media."""
+        media_key = os.urandom(32)
+        plaintext = os.urandom(1000)
+        body = self._encrypted_blob(plaintext, media_key)
+        output_path = str(tmp_path / "out.jpg")
+        message = {
+            "mediaUrl": "https://example.com/image.enc",
+            "mediaKey": base64.b64encode(media_key).decode(),
+            "mediaType": "image",
+            "mimetype": "image/jpeg"
+        }
+        
+        with patch("requests.get", self._fake_get(body)):
+            result = media_handler.download_media(message, output_path)
+        
+        assert result == output_path
+        with open(output_path, "rb") as f:
+            assert f.read() == plaintext
+        assert os.listdir(tmp_path) == ["out.jpg"]
+    
+    def test_download_media_bad_mac(self, media_handler, tmp_path):
+        """Test that tampered media is rejected and nothing is left on disk."""
+        media_key = os.urandom(32)
+        body = bytearray(self._encrypted_blob(os.urandom(1000), media_key))
+        body[-1] ^= 1
+        output_path = str(tmp_path / "out.jpg")
+        message = {
+            "mediaUrl": "https://example.com/image.enc",
+            "mediaKey": base64.b64encode(media_key).decode(),
+            "mediaType": "image"
+        }
+        
+        with patch("requests.get", self._fake_get(bytes(body))):
+            with pytest.raises(WAMediaError):
+                media_handler.download_media(message, output_path)
+        
+        assert os.listdir(tmp_path) == []
+    
+    def test_decrypt_media_stream_truncated(self):
+        """Test that ciphertext cut mid-block raises WAMediaError."""
+        media_key = os.urandom(32)
+        body = self._encrypted_blob(os.urandom(100), media_key)
+        truncated = body[:20] + body[-10:]
+        
+        with pytest.raises(WAMediaError):
+            _decrypt_media_stream([truncated], io.BytesIO(), media_key, "image")
+    
+    def test_encrypt_decrypt_media_stream_roundtrip(self):
+        """Test that encrypted media decrypts back, and that tampering is caught."""
+        import hashlib
+        
+        media_key = os.urandom(32)
+        for size in (0, 15, 16, 1000):
+            plaintext = os.urandom(size)
+            out = io.BytesIO()
+            file_sha256, file_enc_sha256 = _encrypt_media_stream(
+                io.BytesIO(plaintext), out, media_key, "video"
+            )
+            body = out.getvalue()
+            
+            assert file_sha256 == hashlib.sha256(plaintext).digest()
+            assert file_enc_sha256 == hashlib.sha256(body).digest()
+            
+            decrypted = io.BytesIO()
+            _decrypt_media_stream([body], decrypted, media_key, "video")
+            assert decrypted.getvalue() == plaintext
+            
+            tampered = bytearray(body)
+            tampered[0] ^= 1
+            with pytest.raises(WAMediaError):
+                _decrypt_media_stream([bytes(tampered)], io.BytesIO(), media_key, "video")
+    
+    def test_upload_media_encrypts_body(self, media_handler, temp_file):
+        """Test that upload_media posts the encrypted file."""
+        media_key = os.urandom(32)
+        sent = {}
+        
+        def fake_post(url, headers, data, files):
+            sent["body"] = files["file"][1].read()
+            response = MagicMock()
+            response.status_code = 200
+            response.json.return_value = {"url": "https://example.com/enc"}
+            return response
+        
+        media_handler.media_conn_info = {"auth": "token"}
+        with patch("wawspy.media.os.urandom", return_value=media_key), \
+                patch("requests.post", side_effect=fake_post):
+            result = media_handler.upload_media(temp_file)
+        
+        decrypted = io.BytesIO()
+        _decrypt_media_stream([sent["body"]], decrypted, media_key, "image")
+        assert decrypted.getvalue() == b"Test file content"
+        assert result["url"] == "https://example.com/enc"
+        assert result["mediaKey"] == base64.b64encode(media_key).decode()
+        assert "fileEncSha256" in result
+    
+    def test_upload_media_reads_file_once(self, media_handler, temp_file):
+        """Test that upload_media takes the file hash from the encryption pass."""
+        response = MagicMock()
+        response.status_code = 200
+        response.json.return_value = {"url": "https://example.com/enc"}
+        
+        media_handler.media_conn_info = {"auth": "token"}
+        with patch("wawspy.media._file_sha256") as mock_file_sha256, \
+                patch("requests.post", return_value=response):
+            result = media_handler.upload_media(temp_file)
+        
+        assert not mock_file_sha256.called
+        assert result["filehash"] == hashlib.sha256(b"Test file content").hexdigest()
@@ -0,0 +1,86 @@
+"""
+Tests for wawspy session persistence.
+"""
+
+import asyncio
+import os
+import stat
+
+import pytest
+
+from wawspy.auth import WAAuthentication
+from wawspy.client import WAClient
+
+
+@pytest.fixture
+def authenticated():
+    """Create a WAAuthentication holding session tokens"""
+    auth = WAAuthentication()
+    auth.authenticated = True
+    auth.auth_info = {"clientToken": "client", "serverToken": "server"}
+    return auth
+
+
+def test_save_session_is_private(authenticated, tmp_path):
+    """Test that the session file is only readable by its owner"""
+    path = str(tmp_path / "wawspy" / "session.json")
+    authenticated.save_session(path)
+
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert os.listdir(os.path.dirname(path)) == ["session.json"]
+
+    restored = WAAuthentication()
+    assert restored.load_session(path)
+    assert restored.auth_info == authenticated.auth_info
+
+
+def _resume_client(path, server_reply):
+    """Connect a WAClient restored from path and feed it one server reply"""
+    async def scenario():
+        client = WAClient(session_file=path)
+        client.authentication.load_session(path)
+        client._send_queue = asyncio.Queue()
+        await client._on_open(None)
+        init_frame = client._send_queue.get_nowait()[0]
+        authenticated_before_reply = client.is_authenticated
+        await client._on_message(None, server_reply)
+        return client, init_frame, authenticated_before_reply
+
+    return asyncio.run(scenario())
+
+
+def test_resumed_session_waits_for_server(authenticated, tmp_path):
+    """Test that a restored session is only authenticated once the server accepts it"""
+    path = str(tmp_path / "session.json")
+    authenticated.save_session(path)
+
+    client, init_frame, before = _resume_client(path, b's1,{"status":200}')
+
+    assert b'"clientToken":"client"' in init_frame
+    assert not before
+    assert client.is_authenticated
+    assert client.user_info["auth_method"] == "session"
+    assert client.user_info["serverToken"] == "server"
+
+
+def test_rejected_session_is_deleted(authenticated, tmp_path):
+    """Test that a session refused by the server is dropped from disk"""
+    path = str(tmp_path / "session.json")
+    authenticated.save_session(path)
+
+    client, _, _ = _resume_client(path, b's1,{"status":401,"ref":"qr"}')
+
+    assert not client.is_authenticated
+    assert not client.authentication.authenticated
+    assert not os.path.exists(path)
+
+
+def test_session_without_tokens_is_not_saved(tmp_path):
+    """Test that pairing-code sessions, which carry no tokens, are not persisted"""
+    path = str(tmp_path / "session.json")
+    auth = WAAuthentication()
+    auth.authenticated = True
+    auth.auth_info = {"method": "pairing_code"}
+    auth.save_session(path)
+
+    assert not os.path.exists(path)
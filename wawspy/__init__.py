@@ -9,8 +9,8 @@ __version__ = "0.2.0"
 __author__ = "Developer"
 __license__ = "MIT"
 
-# Importuri pentru facilitatea utilizării
-from .client import WAClient
+# Importuri pentru facilitatea utilizării; WAClient și run_all sunt încărcate
+# la primul acces (PEP 562), pentru a nu aduce websocket, qrcode și criptografia la import
 from .exceptions import (
     WABaseError,
     WAConnectionError,
@@ -25,6 +25,7 @@ from .exceptions import (
 __all__ = [
     # Clasa principală
     "WAClient",
+    "run_all",
     
     # Excepții
     "WABaseError",
@@ -35,4 +36,10 @@ __all__ = [
     "WAProtocolError",
     "WATimeoutError",
     "WADecryptionError"
-]
\ No newline at end of file
+]
+
+def __getattr__(name):
+    if name in ("WAClient", "run_all"):
+        from . import client
+        return getattr(client, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -6,16 +6,82 @@ inclusiv scanarea codului QR și utilizarea codului de asociere (pairing code).
 """
 
 import base64
+import functools
 import json
 import os
-import qrcode
 import re
+import secrets
+import tempfile
+import threading
 import time
 from typing import Dict, Optional, Callable, Any, Tuple
 
 from .utils import get_logger
 from .exceptions import WAAuthenticationError
 
+# Celulele codului QR în terminal: caracter plin pentru modulele active, spațiu altfel
+QR_DARK_CELL = "██"
+QR_LIGHT_CELL = "  "
+
+# Tabel pentru str.translate: modulul 0/1 (ca și caracter) devine celula de afișat
+QR_CELL_TABLE = {0: QR_LIGHT_CELL, 1: QR_DARK_CELL}
+
+# Formate validate la autentificare, compilate o singură dată la import
+PHONE_NUMBER_PATTERN = re.compile(r'^\+[1-9]\d{1,14}$')
+PAIRING_CODE_PATTERN = re.compile(r'^\d{6}$')
+
+# Caracterele de formatare eliminate din numerele de telefon într-o singură trecere
+PHONE_FORMATTING_TABLE = str.maketrans("", "", " -()")
+
+# Fișierul implicit al sesiunii salvate și durata ei de valabilitate
+DEFAULT_SESSION_FILE = os.path.join(os.path.expanduser("~"), ".wawspy", "session.json")
+SESSION_TTL_SECONDS = 14 * 24 * 3600
+
+def _has_session_tokens(auth_info: Optional[Dict[str, Any]]) -> bool:
+    """Verifică dacă datele de autentificare conțin token-urile necesare reluării sesiunii."""
+    return bool(auth_info and auth_info.get("clientToken") and auth_info.get("serverToken"))
+
+# Generatorul QR reutilizat între reîmprospătări, creat la prima randare
+_qr_builder = None
+_qr_builder_lock = threading.Lock()
+
+@functools.lru_cache(maxsize=4)
+def _render_qr_terminal(qr_data: str) -> str:
+    """
+    Randează datele unui cod QR ca text pentru terminal.
+    
+    Rezultatul este păstrat în cache după conținut, astfel încât un cod QR
+    retrimis la reîncercări nu mai trece prin codificarea Reed-Solomon.
+    
+    Args:
+        qr_data: Datele pentru generarea codului QR
+        
+    Returns:
+        str: Reprezentarea text a codului QR pentru terminal
+    """
+    # qrcode este importat abia aici, pentru ca autentificarea cu pairing
+    # code să nu plătească încărcarea lui
+    import qrcode
+    
+    global _qr_builder
+    with _qr_builder_lock:
+        if _qr_builder is None:
+            _qr_builder = qrcode.QRCode()
+        else:
+            # Golim datele anterioare și resetăm versiunea, ca dimensiunea
+            # să fie aleasă din nou după noile date
+            _qr_builder.clear()
+            _qr_builder.version = None
+        
+        _qr_builder.add_data(qr_data)
+        qr_terminal = _qr_builder.get_matrix()
+    
+    # Convertim matricea în reprezentare text pentru terminal: rândurile de
+    # octeți 0/1 sunt unite prin "\n" (lăsat neschimbat de tabel) și traduse
+    # în celule printr-un singur apel translate pentru toată matricea
+    cells = b"\n".join(map(bytes, qr_terminal)).decode('latin-1')
+    return cells.translate(QR_CELL_TABLE) + "\n"
+
 class WAAuthentication:
     """
     Manager pentru autentificarea cu WhatsApp Web.
@@ -24,6 +90,9 @@ class WAAuthentication:
     scanarea codului QR și utilizarea codului de asociere.
     """
     
+    # Atribute fixe, fără __dict__ per instanță
+    __slots__ = ("logger", "qr_code", "pairing_ref", "pairing_code", "authenticated", "auth_info")
+    
     def __init__(self):
         """Inițializează managerul de autentificare."""
         self.logger = get_logger("WAAuthentication")
@@ -33,41 +102,35 @@ class WAAuthentication:
         self.authenticated = False
         self.auth_info = None
     
-    def handle_qr_code(self, qr_data: str, callback: Optional[Callable] = None) -> str:
+    @property
+    def terminal_qr(self) -> Optional[str]:
+        """
+        Reprezentarea text a codului QR curent pentru terminal.
+        
+        Este randată abia la primul acces, astfel încât clienții care folosesc
+        doar datele QR nu plătesc randarea.
+        """
+        if self.qr_code is None:
+            return None
+        return _render_qr_terminal(self.qr_code)
+    
+    def handle_qr_code(self, qr_data: str, callback: Optional[Callable] = None) -> None:
         """
         Gestionează datele codului QR pentru autentificare.
         
+        Codul QR este doar memorat; textul pentru terminal se obține la cerere
+        prin proprietatea terminal_qr.
+        
         Args:
             qr_data: Datele pentru generarea codului QR
             callback: Funcție opțională de callback pentru notificarea aplicației client
-            
-        Returns:
-            str: Reprezentarea text a codului QR pentru terminal
         """
         self.qr_code = qr_data
         self.logger.info("Cod QR primit pentru autentificare")
         
-        # Afișăm codul QR în terminal
-        qr = qrcode.QRCode()
-        qr.add_data(qr_data)
-        qr_terminal = qr.get_matrix()
-        
-        # Convertim matricea în reprezentare text pentru terminal
-        terminal_qr = ""
-        for row in qr_terminal:
-            line = ""
-            for cell in row:
-                if cell:
-                    line += "██"  # Caracter plin pentru celulele active
-                else:
-                    line += "  "  # Spațiu pentru celulele inactive
-            terminal_qr += line + "\n"
-        
         # Notificăm aplicația client dacă este furnizat un callback
         if callback:
             callback(qr_data)
-            
-        return terminal_qr
     
     def request_pairing_code(self, phone_number: str) -> str:
         """
@@ -77,7 +140,8 @@ class WAAuthentication:
         unui cod QR, ci introduce un cod numeric pe telefonul mobil.
         
         Args:
-            phone_number: Numărul de telefon în format internațional (ex: +40123456789)
+            phone_number: Numărul de telefon în format internațional (ex: +40123456789),
+                eventual cu spații, cratime sau paranteze
             
         Returns:
             str: Referința pentru codul de asociere sau None dacă solicitarea eșuează
@@ -85,20 +149,24 @@ class WAAuthentication:
         Raises:
             WAAuthenticationError: Dacă apare o eroare la solicitarea codului
         """
+        # Eliminăm spațiile, cratimele și parantezele (ex: "+40 (123) 456-789")
+        phone_number = phone_number.translate(PHONE_FORMATTING_TABLE)
+        
         # Validăm formatul numărului de telefon
-        if not re.match(r'^\+[1-9]\d{1,14}$', phone_number):
+        if not PHONE_NUMBER_PATTERN.match(phone_number):
             raise WAAuthenticationError("Format invalid pentru numărul de telefon. Utilizați formatul internațional: +40123456789")
         
-        # Eliminăm caracterul '+' de la început
-        phone_number = phone_number.lstrip('+')
+        # Eliminăm caracterul '+' de la început, garantat de validare
+        phone_number = phone_number[1:]
         
         self.logger.info(f"Solicitare cod de asociere pentru numărul {phone_number}")
         
         # În implementarea reală, aici s-ar trimite solicitarea către serverul WhatsApp
         # și s-ar primi referința pentru codul de asociere
         
-        # Pentru simulare, generăm o referință aleatorie
-        self.pairing_ref = "pairing_ref_" + str(int(time.time()))
+        # Pentru simulare, generăm o referință aleatorie, unică și la cereri
+        # făcute în aceeași secundă
+        self.pairing_ref = "pairing_ref_" + secrets.token_hex(8)
         
         # Pairing code-ul va fi afișat pe telefonul utilizatorului
         # În implementarea reală, acest cod ar fi generat de WhatsApp și trimis pe telefonul utilizatorului
@@ -125,7 +193,7 @@ class WAAuthentication:
             raise WAAuthenticationError("Nu există o solicitare activă pentru cod de asociere")
             
         # Validăm formatul codului
-        if not re.match(r'^\d{6}$', code):
+        if not PAIRING_CODE_PATTERN.match(code):
             raise WAAuthenticationError("Format invalid pentru codul de asociere. Trebuie să conțină 6 cifre.")
             
         # În implementarea reală, aici s-ar verifica codul cu serverul WhatsApp
@@ -155,6 +223,88 @@ class WAAuthentication:
         self.auth_info = auth_data
         self.logger.info("Autentificare reușită cu WhatsApp Web")
     
+    def save_session(self, path: str = DEFAULT_SESSION_FILE, ttl: float = SESSION_TTL_SECONDS) -> None:
+        """
+        Salvează datele de autentificare pe disc, pentru reluarea sesiunii.
+        
+        Args:
+            path: Calea fișierului de sesiune
+            ttl: Durata de valabilitate a sesiunii în secunde
+        """
+        # Fără token-uri sesiunea nu poate fi reluată (ex. autentificare prin
+        # cod de asociere), deci nu are rost să fie păstrată
+        if not self.authenticated or not _has_session_tokens(self.auth_info):
+            return
+        
+        session = {
+            "auth_info": self.auth_info,
+            "expires_at": time.time() + ttl
+        }
+        
+        # Scriere atomică: un fișier temporar unic (creat cu permisiuni 0600 de
+        # mkstemp, deoarece conține token-urile) înlocuiește dintr-o dată fișierul final
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".session-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(session, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        self.logger.info(f"Sesiune salvată în {path}")
+    
+    def load_session(self, path: str = DEFAULT_SESSION_FILE) -> bool:
+        """
+        Restaurează datele de autentificare salvate, dacă nu au expirat.
+        
+        Args:
+            path: Calea fișierului de sesiune
+            
+        Returns:
+            bool: True dacă sesiunea a fost restaurată, False altfel
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                session = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Nu s-a putut citi sesiunea salvată: {e}")
+            return False
+        
+        if session.get("expires_at", 0) <= time.time():
+            self.logger.info("Sesiunea salvată a expirat")
+            return False
+        
+        if not _has_session_tokens(session.get("auth_info")):
+            self.logger.info("Sesiunea salvată nu conține token-uri și este ignorată")
+            return False
+        
+        self.authenticated = True
+        self.auth_info = session["auth_info"]
+        self.logger.info(f"Sesiune restaurată din {path}")
+        return True
+    
+    def delete_session(self, path: str = DEFAULT_SESSION_FILE) -> None:
+        """
+        Șterge fișierul de sesiune, de exemplu după ce serverul l-a respins.
+        
+        Args:
+            path: Calea fișierului de sesiune
+        """
+        try:
+            os.remove(path)
+            self.logger.info(f"Sesiune ștearsă: {path}")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self.logger.warning(f"Nu s-a putut șterge sesiunea salvată: {e}")
+    
     def reset(self) -> None:
         """Resetează starea de autentificare."""
         self.qr_code = None
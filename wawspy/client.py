@@ -6,17 +6,25 @@ cu focus pe stabilitatea conexiunii WebSocket și gestionarea media.
 """
 
 import asyncio
-import json
+import inspect
 import logging
 import os
 import qrcode
-import websocket
+import websockets
 import time
-from typing import Dict, List, Optional, Callable, Any, Union, Tuple
+from typing import Dict, Iterable, List, Optional, Callable, Any, Union, Tuple
 
-from .utils import get_logger, phone_number_to_jid, jid_to_phone, generate_message_tag
+from .utils import (
+    get_logger,
+    phone_number_to_jid,
+    jid_to_phone,
+    generate_message_tag,
+    split_frame,
+    decode_payload,
+    json_dumps
+)
 from .encryption import WAEncryption
-from .auth import WAAuthentication
+from .auth import WAAuthentication, _has_session_tokens
 from .protocol import WANode
 from .exceptions import (
     WAConnectionError,
@@ -26,20 +34,53 @@ from .exceptions import (
     WATimeoutError
 )
 
+# Parametrii conexiunii WebSocket
+WA_WS_URL = "wss://web.whatsapp.com/ws"
+WA_ORIGIN = "https://web.whatsapp.com"
+WA_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/110.0.5481.177 Safari/537.36"
+
+# Dimensiunea cozii de trimitere și numărul maxim de cadre scrise la o trezire
+SEND_QUEUE_SIZE = 4096
+SEND_BATCH_SIZE = 128
+
+# Timpul maxim (secunde) acordat cadrelor din coadă să plece la deconectare
+DISCONNECT_DRAIN_TIMEOUT = 5.0
+
+# Câmpurile fixe ale mesajului de inițializare, serializate o singură dată la
+# import; la fiecare conexiune se adaugă doar clientId și, la reluarea
+# sesiunii, token-urile
+_INIT_FRAME_PREFIX = b'admin,{"clientId":'
+_INIT_FRAME_SUFFIX = b"," + json_dumps({
+    "connectType": "WIFI_UNKNOWN",
+    "connectReason": "USER_ACTIVATED",
+    "userAgent": WA_USER_AGENT,
+    "webVersion": "2.2402.7",
+    "browserName": "Chrome",
+    "browserVersion": "110.0.5481.177"
+})[1:]
+
 class WAClient:
     """
     Client WhatsApp Web cu suport pentru protocol binar, criptare și autentificare.
     
     Această clasă furnizează interfața principală pentru conectarea la WhatsApp Web și
     interacțiunea cu serviciul prin trimiterea și primirea mesajelor și media.
+    
+    Clientul rulează pe bucla asyncio: citirea și scrierea cadrelor au loc pe
+    același fir, iar callback-urile pot fi funcții obișnuite sau corutine.
     """
     
-    def __init__(self, log_level: int = logging.INFO):
+    def __init__(self, log_level: int = logging.INFO, session_file: Optional[str] = None):
         """
         Inițializează clientul WhatsApp Web.
         
         Args:
             log_level: Nivelul de logging (implicit: INFO)
+            session_file: Fișierul în care se salvează sesiunea autentificată,
+                pentru reluare fără QR (ex. auth.DEFAULT_SESSION_FILE, adică
+                ~/.wawspy/session.json). Fișierul conține token-urile contului
+                și este creat cu permisiuni 0600. Implicit (None) sesiunea nu
+                se salvează și nu se restaurează.
         """
         # Configurare logging
         logging.basicConfig(
@@ -49,18 +90,28 @@ class WAClient:
         
         self.logger = get_logger("WAClient")
         self.ws = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._send_queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._qr_task: Optional[asyncio.Task] = None
         self.authentication = WAAuthentication()
+        self.session_file = session_file
         self.encryption = WAEncryption()
         
         # State management
         self._connected = False
         self._authenticated = False
+        self._resuming = False
+        self._connected_evt = asyncio.Event()
+        self._auth_evt = asyncio.Event()
+        
+        # Callbacks, indexate după tipul de eveniment
+        self._callbacks: Dict[str, Optional[Callable]] = dict.fromkeys(
+            ("message", "qr_code", "connected", "disconnected")
+        )
         
-        # Callbacks
-        self._on_message_callback = None
-        self._on_qr_code_callback = None
-        self._on_connected_callback = None
-        self._on_disconnected_callback = None
+        # Handler-e pentru tag-urile tratate intern; restul ajung la callback
+        self._handlers: Dict[str, Callable] = {"s1": self._handle_s1}
         
         # Informații client
         self.user_info = None
@@ -70,17 +121,21 @@ class WAClient:
     @property
     def is_connected(self) -> bool:
         """Verifică dacă clientul este conectat la WhatsApp Web."""
-        return self._connected and self.ws and self.ws.connected
+        # _connected este setat doar după deschiderea conexiunii și resetat la închidere
+        return self._connected
         
     @property
     def is_authenticated(self) -> bool:
         """Verifică dacă clientul este autentificat cu WhatsApp Web."""
         return self._authenticated
         
-    def connect(self) -> None:
+    async def connect(self) -> None:
         """
         Conectare la WhatsApp Web.
         
+        Metoda revine după stabilirea conexiunii; mesajele primite sunt citite
+        în continuare de un task pe bucla asyncio curentă.
+        
         Raises:
             WAConnectionError: Dacă apare o eroare la conexiune
         """
@@ -88,36 +143,131 @@ class WAClient:
             self.logger.warning("Deja conectat la WhatsApp Web")
             return
             
+        # Restaurăm sesiunea salvată, dacă există, pentru a evita o nouă autentificare
+        if self.session_file:
+            self.authentication.load_session(self.session_file)
+        
         try:
-            # URL-ul pentru conexiunea WebSocket
-            websocket_url = "wss://web.whatsapp.com/ws"
-            
-            # Header-uri pentru conexiune
-            headers = {
-                "Origin": "https://web.whatsapp.com",
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/110.0.5481.177 Safari/537.36"
-            }
-            
-            # Configurare WebSocket client
-            websocket.enableTrace(False)
-            self.ws = websocket.WebSocketApp(
-                websocket_url,
-                header=headers,
-                on_open=self._on_open,
-                on_message=self._on_message,
-                on_error=self._on_error,
-                on_close=self._on_close
+            self.logger.info("Conectare la WhatsApp Web...")
+            self.ws = await websockets.connect(
+                WA_WS_URL,
+                origin=WA_ORIGIN,
+                user_agent_header=WA_USER_AGENT,
+                compression=None,
+                max_size=None
             )
             
-            # Pornire conexiune WebSocket în thread separat
-            self.logger.info("Conectare la WhatsApp Web...")
-            self.ws.run_forever()
+            # Cadrele trimise trec printr-o coadă golită de un singur task
+            self._send_queue = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+            self._writer_task = asyncio.create_task(self._writer(self.ws))
+            
+            await self._on_open(self.ws)
             
         except Exception as e:
             self.logger.error(f"Eroare la conexiune: {e}")
+            await self._abort_connect()
             raise WAConnectionError(f"Nu s-a putut stabili conexiunea: {e}")
+        
+        # Citim mesajele primite pe bucla asyncio, fără un fir dedicat
+        self._reader_task = asyncio.create_task(self._read_loop(self.ws))
+    
+    async def _abort_connect(self) -> None:
+        """
+        Eliberează conexiunea și task-ul de scriere după o conectare eșuată,
+        pentru ca un nou connect() să pornească de la zero.
+        """
+        writer_task = self._writer_task
+        self._writer_task = None
+        if writer_task:
+            writer_task.cancel()
+            try:
+                await writer_task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                self.logger.debug(f"Task-ul de scriere s-a oprit cu eroare: {e}")
+        
+        ws = self.ws
+        self.ws = None
+        if ws:
+            try:
+                await ws.close()
+            except Exception as e:
+                self.logger.debug(f"Eroare la închiderea conexiunii: {e}")
+        
+        self._send_queue = None
+        self._connected = False
+        self._resuming = False
+        self._connected_evt.clear()
+    
+    async def run(self) -> None:
+        """
+        Conectează clientul, dacă este nevoie, și rulează până la închiderea conexiunii.
+        
+        Raises:
+            WAConnectionError: Dacă apare o eroare la conexiune
+        """
+        if not self.is_connected:
+            await self.connect()
+        
+        if self._reader_task:
+            await self._reader_task
+    
+    async def _read_loop(self, ws) -> None:
+        """
+        Citește cadrele primite până la închiderea conexiunii.
+        
+        Args:
+            ws: Conexiunea WebSocket
+        """
+        try:
+            # Cadrele sunt primite ca octeți nedecodați; _on_message decodează
+            # doar tag-ul și, la nevoie, conținutul
+            while True:
+                message = await ws.recv(decode=False)
+                await self._on_message(ws, message)
+        except websockets.ConnectionClosed:
+            pass
+        except Exception as e:
+            self._on_error(ws, e)
+        finally:
+            await self._on_close(ws, ws.close_code, ws.close_reason)
     
-    def disconnect(self) -> None:
+    async def _writer(self, ws) -> None:
+        """
+        Trimite cadrele din coadă, preluând la fiecare trezire tot ce s-a acumulat.
+        
+        Args:
+            ws: Conexiunea WebSocket
+        """
+        while True:
+            batch = [await self._send_queue.get()]
+            while len(batch) < SEND_BATCH_SIZE and not self._send_queue.empty():
+                batch.append(self._send_queue.get_nowait())
+            
+            try:
+                # Protocolul cere câte un cadru WebSocket pentru fiecare mesaj,
+                # dar cadrele scrise fără a ceda bucla ajung grupate în transport
+                for frame, text in batch:
+                    await ws.send(frame, text=text)
+            except Exception as e:
+                self.logger.error(f"Eroare la trimiterea cadrelor: {e}")
+            finally:
+                for _ in batch:
+                    self._send_queue.task_done()
+    
+    async def _send_frame(self, frame: bytes, text: bool = True) -> None:
+        """
+        Pune un cadru în coada de trimitere.
+        
+        Args:
+            frame: Cadrul în format tag,date
+            text: True pentru un cadru text (JSON codificat UTF-8), False
+                pentru un cadru binar (date criptate)
+        """
+        await self._send_queue.put((frame, text))
+    
+    async def disconnect(self) -> None:
         """
         Deconectare de la WhatsApp Web.
         """
@@ -126,8 +276,24 @@ class WAClient:
             return
             
         try:
+            # Lăsăm cadrele deja puse în coadă să plece înainte de închidere,
+            # dar nu la nesfârșit dacă task-ul de scriere s-a oprit
+            if self._send_queue and self._writer_task and not self._writer_task.done():
+                try:
+                    await asyncio.wait_for(self._send_queue.join(), DISCONNECT_DRAIN_TIMEOUT)
+                except asyncio.TimeoutError:
+                    self.logger.warning("Cadrele rămase în coadă nu au fost trimise înainte de închidere")
+            
             if self.ws:
-                self.ws.close()
+                await self.ws.close()
+            
+            # Task-ul de citire se încheie după închidere și notifică deconectarea;
+            # apelat dintr-un callback, disconnect() rulează chiar în acest task,
+            # care nu se poate aștepta pe sine
+            reader_task = self._reader_task
+            self._reader_task = None
+            if reader_task and reader_task is not asyncio.current_task():
+                await reader_task
                 
             self._connected = False
             self._authenticated = False
@@ -136,7 +302,7 @@ class WAClient:
         except Exception as e:
             self.logger.error(f"Eroare la deconectare: {e}")
     
-    def wait_for_connection(self, timeout: int = 60) -> bool:
+    async def wait_for_connection(self, timeout: int = 60) -> bool:
         """
         Așteaptă stabilirea conexiunii.
         
@@ -146,13 +312,14 @@ class WAClient:
         Returns:
             bool: True dacă s-a conectat în timpul specificat, False altfel
         """
-        start_time = time.time()
-        while not self.is_connected and time.time() - start_time < timeout:
-            time.sleep(0.5)
+        try:
+            await asyncio.wait_for(self._connected_evt.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
         
         return self.is_connected
     
-    def wait_for_authentication(self, timeout: int = 120) -> bool:
+    async def wait_for_authentication(self, timeout: int = 120) -> bool:
         """
         Așteaptă finalizarea autentificării.
         
@@ -162,9 +329,10 @@ class WAClient:
         Returns:
             bool: True dacă s-a autentificat în timpul specificat, False altfel
         """
-        start_time = time.time()
-        while not self.is_authenticated and time.time() - start_time < timeout:
-            time.sleep(0.5)
+        try:
+            await asyncio.wait_for(self._auth_evt.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
         
         return self.is_authenticated
     
@@ -178,7 +346,11 @@ class WAClient:
         Args:
             callback: Funcție opțională pentru primirea datelor codului QR
         """
-        self._on_qr_code_callback = callback
+        if self.is_authenticated:
+            self.logger.info("Sesiune deja autentificată; codul QR nu este necesar")
+            return
+            
+        self._callbacks["qr_code"] = callback
         self.logger.info("Autentificare prin cod QR inițiată. Așteptând codul QR...")
     
     def authenticate_with_pairing_code(self, phone_number: str) -> str:
@@ -199,6 +371,10 @@ class WAClient:
         """
         if not self.is_connected:
             raise WAConnectionError("Nu există o conexiune activă. Conectați-vă mai întâi")
+        
+        if self.is_authenticated:
+            self.logger.info("Sesiune deja autentificată; codul de asociere nu este necesar")
+            return "Sesiune restaurată. Nu este necesar un cod de asociere."
             
         try:
             pairing_ref = self.authentication.request_pairing_code(phone_number)
@@ -214,7 +390,7 @@ class WAClient:
             self.logger.error(f"Eroare la solicitarea codului de asociere: {e}")
             raise WAAuthenticationError(f"Nu s-a putut solicita codul de asociere: {e}")
     
-    def verify_pairing_code(self, code: str) -> bool:
+    async def verify_pairing_code(self, code: str) -> bool:
         """
         Verifică un cod de asociere introdus de utilizator.
         
@@ -229,6 +405,9 @@ class WAClient:
         """
         if not self.is_connected:
             raise WAConnectionError("Nu există o conexiune activă. Conectați-vă mai întâi")
+        
+        if self.is_authenticated:
+            return True
             
         try:
             result = self.authentication.verify_pairing_code(code)
@@ -240,11 +419,13 @@ class WAClient:
                     "timestamp": time.time()
                 }
                 
+                self._auth_evt.set()
+                
                 self.logger.info("Autentificare reușită prin cod de asociere")
+                self._save_session()
                 
                 # Notificăm callback-ul de conectare dacă există
-                if self._on_connected_callback:
-                    self._on_connected_callback(self.user_info)
+                await self._notify("connected", self.user_info)
             
             return result
             
@@ -260,18 +441,12 @@ class WAClient:
             event_type: Tipul de eveniment ('message', 'qr_code', 'connected', 'disconnected')
             callback: Funcția de callback care va fi apelată la emiterea evenimentului
         """
-        if event_type == 'message':
-            self._on_message_callback = callback
-        elif event_type == 'qr_code':
-            self._on_qr_code_callback = callback
-        elif event_type == 'connected':
-            self._on_connected_callback = callback
-        elif event_type == 'disconnected':
-            self._on_disconnected_callback = callback
+        if event_type in self._callbacks:
+            self._callbacks[event_type] = callback
         else:
             self.logger.warning(f"Tip de eveniment necunoscut: {event_type}")
     
-    def send_message(self, to: str, text: str) -> Dict[str, Any]:
+    async def send_message(self, to: str, text: str) -> Dict[str, Any]:
         """
         Trimite un mesaj text.
         
@@ -316,9 +491,9 @@ class WAClient:
             binary_data = WANode.encode(message_node)
             encrypted_data = self.encryption.encrypt_message(binary_data)
             
-            # Trimitem mesajul
+            # Trimitem mesajul criptat ca octeți bruți, într-un cadru binar
             tag = generate_message_tag()
-            self.ws.send(f"{tag},{encrypted_data.hex()}")
+            await self._send_frame(b"%s,%s" % (tag.encode('ascii'), encrypted_data), text=False)
             
             self.logger.info(f"Mesaj trimis către {recipient}")
             
@@ -337,7 +512,30 @@ class WAClient:
             self.logger.error(f"Eroare la trimiterea mesajului: {e}")
             raise WAMessageError(f"Nu s-a putut trimite mesajul: {e}")
     
-    def _on_open(self, ws) -> None:
+    async def _notify(self, event_type: str, *args) -> None:
+        """
+        Apelează callback-ul înregistrat pentru un eveniment, dacă există.
+        
+        Args:
+            event_type: Tipul evenimentului
+            *args: Argumentele transmise callback-ului
+        """
+        callback = self._callbacks[event_type]
+        if callback:
+            result = callback(*args)
+            if inspect.isawaitable(result):
+                await result
+    
+    def _save_session(self) -> None:
+        """Salvează sesiunea autentificată, fără a întrerupe fluxul la erori de disc."""
+        if not self.session_file:
+            return
+        try:
+            self.authentication.save_session(self.session_file)
+        except OSError as e:
+            self.logger.warning(f"Nu s-a putut salva sesiunea: {e}")
+    
+    async def _on_open(self, ws) -> None:
         """
         Handler pentru evenimentul de deschidere a conexiunii WebSocket.
         
@@ -345,86 +543,61 @@ class WAClient:
             ws: Obiectul WebSocket
         """
         self._connected = True
+        self._connected_evt.set()
         self.logger.info("Conexiune WebSocket stabilită")
         
-        # Trimitem mesajul de inițializare
-        init_message = {
-            "clientId": generate_message_tag(),
-            "connectType": "WIFI_UNKNOWN",
-            "connectReason": "USER_ACTIVATED",
-            "userAgent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/110.0.5481.177 Safari/537.36",
-            "webVersion": "2.2402.7",
-            "browserName": "Chrome",
-            "browserVersion": "110.0.5481.177"
-        }
+        # Reluăm sesiunea restaurată cu token-urile salvate, fără QR sau pairing;
+        # clientul devine autentificat doar după ce serverul acceptă token-urile
+        tokens = b""
+        auth_info = self.authentication.auth_info
+        if self.authentication.authenticated and _has_session_tokens(auth_info):
+            tokens = b',"clientToken":%s,"serverToken":%s' % (
+                json_dumps(auth_info["clientToken"]),
+                json_dumps(auth_info["serverToken"])
+            )
+            self._resuming = True
+            self.logger.info("Se reia sesiunea salvată; se așteaptă confirmarea serverului")
         
-        self.ws.send(f"admin,{json.dumps(init_message)}")
+        # Trimitem mesajul de inițializare, completând doar câmpurile variabile
+        await self._send_frame(b"".join((
+            _INIT_FRAME_PREFIX,
+            json_dumps(generate_message_tag()),
+            tokens,
+            _INIT_FRAME_SUFFIX
+        )))
     
-    def _on_message(self, ws, message) -> None:
+    async def _on_message(self, ws, message) -> None:
         """
         Handler pentru mesajele primite prin WebSocket.
         
         Args:
             ws: Obiectul WebSocket
-            message: Mesajul primit
+            message: Mesajul primit, ca octeți sau text
         """
         try:
-            # Parsăm mesajul în format tag,data
-            parts = message.split(',', 1)
-            if len(parts) < 2:
-                self.logger.warning(f"Format mesaj neașteptat: {message[:50]}...")
+            # Separăm tag-ul de conținut fără a copia sau decoda tot cadrul
+            frame = split_frame(message)
+            if frame is None:
+                self.logger.warning(f"Format mesaj neașteptat: {message[:50]!r}...")
                 return
                 
-            tag = parts[0]
-            data_str = parts[1]
+            tag, payload = frame
+            handler = self._handlers.get(tag)
             
-            # Tratăm mesajele speciale
+            # Fără handler intern și fără callback, conținutul nu mai este parsat
+            if handler is None and not self._callbacks["message"]:
+                return
             
-            # Mesaj de autentificare cu QR code
-            if tag == "s1" and '"status":401' in data_str and '"ref":' in data_str:
-                try:
-                    data = json.loads(data_str)
-                    qr_data = data.get("ref", "")
-                    if qr_data:
-                        qr_terminal = self.authentication.handle_qr_code(qr_data, self._on_qr_code_callback)
-                        print("\nScanați codul QR de mai jos cu aplicația WhatsApp de pe telefonul dvs.:\n")
-                        print(qr_terminal)
-                except json.JSONDecodeError:
-                    self.logger.error("Eroare la parsarea datelor QR")
-                
-            # Mesaj de succes la autentificare
-            elif tag == "s1" and '"status":200' in data_str:
-                try:
-                    data = json.loads(data_str)
-                    self._authenticated = True
-                    self.authentication.handle_auth_success(data)
-                    self.user_info = {
-                        "auth_method": "qr_code",
-                        "timestamp": time.time(),
-                        "serverToken": data.get("serverToken"),
-                        "clientToken": data.get("clientToken")
-                    }
-                    
-                    self.logger.info("Autentificare reușită cu WhatsApp Web")
-                    
-                    # Notificăm callback-ul de conectare dacă există
-                    if self._on_connected_callback:
-                        self._on_connected_callback(self.user_info)
-                        
-                except json.JSONDecodeError:
-                    self.logger.error("Eroare la parsarea datelor de autentificare")
+            data = decode_payload(payload)
+            if handler is not None and await handler(data):
+                return
             
             # Alte mesaje le trimitem către callback
-            elif self._on_message_callback:
+            if self._callbacks["message"]:
                 try:
                     # Pentru mesajele criptate, le-am decripta aici
                     # În această implementare, tratăm doar mesajele în text
-                    try:
-                        data = json.loads(data_str)
-                    except json.JSONDecodeError:
-                        data = data_str
-                        
-                    self._on_message_callback({
+                    await self._notify("message", {
                         "tag": tag,
                         "data": data
                     })
@@ -434,6 +607,96 @@ class WAClient:
         except Exception as e:
             self.logger.error(f"Eroare la procesarea mesajului: {e}")
     
+    async def _handle_s1(self, data: Any) -> bool:
+        """
+        Tratează mesajele s1, direcționate după statusul din conținut.
+        
+        Args:
+            data: Conținutul parsat al mesajului
+            
+        Returns:
+            bool: True dacă mesajul a fost tratat, False dacă ajunge la callback
+        """
+        if not isinstance(data, dict):
+            return False
+        
+        status = data.get("status")
+        if self._resuming and status != 200:
+            self._reject_session()
+        if status == 401 and "ref" in data:
+            await self._handle_qr_code(data)
+            return True
+        if status == 200:
+            await self._handle_auth_success(data)
+            return True
+        return False
+    
+    async def _handle_qr_code(self, data: Dict[str, Any]) -> None:
+        """
+        Tratează mesajul de autentificare cu cod QR.
+        
+        Args:
+            data: Conținutul mesajului, cu codul QR în câmpul "ref"
+        """
+        qr_data = data.get("ref", "")
+        if qr_data:
+            self.authentication.handle_qr_code(qr_data)
+            await self._notify("qr_code", qr_data)
+            
+            # Randarea pentru terminal rulează într-un fir separat, astfel încât
+            # citirea cadrelor continuă imediat; un cod QR mai vechi nu mai
+            # este afișat dacă a sosit deja unul nou
+            if self._qr_task and not self._qr_task.done():
+                self._qr_task.cancel()
+            self._qr_task = asyncio.create_task(self._print_qr())
+    
+    async def _print_qr(self) -> None:
+        """Randează codul QR curent într-un fir separat și îl afișează în terminal."""
+        qr_terminal = await asyncio.to_thread(lambda: self.authentication.terminal_qr)
+        if qr_terminal:
+            print("\nScanați codul QR de mai jos cu aplicația WhatsApp de pe telefonul dvs.:\n")
+            print(qr_terminal)
+    
+    async def _handle_auth_success(self, data: Dict[str, Any]) -> None:
+        """
+        Tratează mesajul de succes la autentificare.
+        
+        Args:
+            data: Conținutul mesajului, cu token-urile sesiunii
+        """
+        auth_method = "qr_code"
+        if self._resuming:
+            # Serverul a acceptat token-urile restaurate; păstrăm token-urile
+            # pe care nu le retrimite
+            self._resuming = False
+            auth_method = "session"
+            data = {**self.authentication.auth_info, **data}
+        
+        self._authenticated = True
+        self.authentication.handle_auth_success(data)
+        self.user_info = {
+            "auth_method": auth_method,
+            "timestamp": time.time(),
+            "serverToken": data.get("serverToken"),
+            "clientToken": data.get("clientToken")
+        }
+        
+        self._auth_evt.set()
+        
+        self.logger.info("Autentificare reușită cu WhatsApp Web")
+        self._save_session()
+        
+        # Notificăm callback-ul de conectare dacă există
+        await self._notify("connected", self.user_info)
+    
+    def _reject_session(self) -> None:
+        """Renunță la sesiunea restaurată pe care serverul a respins-o și îi șterge fișierul."""
+        self._resuming = False
+        self.authentication.reset()
+        if self.session_file:
+            self.authentication.delete_session(self.session_file)
+        self.logger.warning("Sesiunea salvată a fost respinsă de server; este necesară o nouă autentificare")
+    
     def _on_error(self, ws, error) -> None:
         """
         Handler pentru erori WebSocket.
@@ -444,7 +707,7 @@ class WAClient:
         """
         self.logger.error(f"Eroare WebSocket: {error}")
     
-    def _on_close(self, ws, close_status_code, close_reason) -> None:
+    async def _on_close(self, ws, close_status_code, close_reason) -> None:
         """
         Handler pentru închiderea conexiunii WebSocket.
         
@@ -454,6 +717,19 @@ class WAClient:
             close_reason: Motivul închiderii
         """
         self._connected = False
+        self._resuming = False
+        self._connected_evt.clear()
+        self._auth_evt.clear()
+        
+        if self._qr_task:
+            self._qr_task.cancel()
+            self._qr_task = None
+        
+        # Cadrele rămase în coadă nu mai au pe unde pleca
+        if self._writer_task:
+            self._writer_task.cancel()
+            self._writer_task = None
+        self._send_queue = None
         close_info = f"Status: {close_status_code}, Motiv: {close_reason}" if close_status_code else "Fără informații"
         self.logger.info(f"Conexiune WebSocket închisă. {close_info}")
         
@@ -463,8 +739,19 @@ class WAClient:
             self.authentication.reset()
             
         # Notificăm callback-ul de deconectare dacă există
-        if self._on_disconnected_callback:
-            self._on_disconnected_callback({
-                "status_code": close_status_code,
-                "reason": close_reason
-            })
\ No newline at end of file
+        await self._notify("disconnected", {
+            "status_code": close_status_code,
+            "reason": close_reason
+        })
+
+async def run_all(clients: Iterable[WAClient]) -> None:
+    """
+    Rulează mai mulți clienți pe aceeași buclă asyncio, până la închiderea tuturor.
+    
+    Conexiunile sunt multiplexate de bucla curentă (epoll pe Linux, sau uvloop
+    dacă aplicația îl folosește), fără fire dedicate pentru fiecare cont.
+    
+    Args:
+        clients: Clienții de rulat
+    """
+    await asyncio.gather(*(client.run() for client in clients))
@@ -5,8 +5,11 @@ This module handles establishing and maintaining a WebSocket connection to
 WhatsApp Web servers, with improved reconnection logic and error handling.
 """
 
-import json
+import collections
+import concurrent.futures
 import logging
+import queue
+import statistics
 import time
 import websocket
 import threading
@@ -15,8 +18,14 @@ import base64
 from typing import Callable, Dict, Optional, List, Any, Union
 from urllib.parse import urlencode
 
-from .errors import WAConnectionError, WAAuthenticationError
-from .utils import generate_message_tag, generate_client_id
+from .exceptions import WAConnectionError, WAAuthenticationError
+from .utils import (
+    generate_message_tag,
+    generate_client_id,
+    split_frame,
+    decode_payload,
+    json_dumps
+)
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +35,45 @@ WA_ORIGIN = "https://web.whatsapp.com"
 WA_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/110.0.5481.177 Safari/537.36"
 WA_VERSION = "2.2402.7"
 WA_WEB_BROWSER = "Chrome,110.0.5481.177"
+EVENT_QUEUE_SIZE = 1024
+
+# Adaptive keepalive/reconnect tuning from observed connection lifetimes
+CONNECTION_HISTORY_SIZE = 256
+MIN_CONNECTION_HISTORY = 8
+MIN_KEEPALIVE_INTERVAL = 5
+MAX_KEEPALIVE_INTERVAL = 60
+MIN_RECONNECT_INTERVAL = 1
+
+# Events accepted by WAConnection.register_callback
+CALLBACK_EVENTS = frozenset(("on_message", "on_connect", "on_close", "on_error"))
+
+# Static part of the init message, encoded once at import; only the client
+# id and, when resuming, the session tokens are added per connection
+_INIT_PAYLOAD_SUFFIX = b"," + json_dumps({
+    "connectType": "WIFI_UNKNOWN",
+    "connectReason": "USER_ACTIVATED",
+    "userAgent": WA_USER_AGENT,
+    "webVersion": "2.2319.9",
+    "browserName": "Chrome"
+})[1:]
+
+def _callback_property(event: str) -> property:
+    """
+    Expose a callback stored in the connection's callback map as an attribute.
+    
+    Args:
+        event: Callback name in the map (e.g. "on_message")
+        
+    Returns:
+        property: Read/write accessor for the callback
+    """
+    def getter(self) -> Optional[Callable]:
+        return self._callbacks.get(event)
+    
+    def setter(self, callback: Optional[Callable]) -> None:
+        self._callbacks[event] = callback
+    
+    return property(getter, setter)
 
 class WAConnection:
     """
@@ -35,36 +83,59 @@ class WAConnection:
     with improved reconnection logic based on insights from @whiskeysockets/baileys.
     """
     
+    # Attribute-style access to the registered callbacks
+    on_message_callback = _callback_property("on_message")
+    on_connect_callback = _callback_property("on_connect")
+    on_close_callback = _callback_property("on_close")
+    on_error_callback = _callback_property("on_error")
+    
     def __init__(self):
         self.ws: Optional[websocket.WebSocketApp] = None
         self.connected = False
         self.authenticated = False
+        self._connected_evt = threading.Event()
+        # Set by disconnect() to cancel a pending reconnect wait
+        self._closing = threading.Event()
         self.client_id = generate_client_id()
         self.client_token = None
         self.server_token = None
         self.secret = None
         self.last_seen = None
         
-        # Callbacks
-        self.on_message_callback = None
-        self.on_connect_callback = None
-        self.on_close_callback = None
-        self.on_error_callback = None
+        # Callbacks, keyed by event name (on_message, on_connect, on_close, on_error)
+        self._callbacks: Dict[str, Optional[Callable]] = {}
         
         # Connection parameters
         self.reconnect_interval = 3
         self.max_reconnect_interval = 60
-        self.reconnect_decay = 1.5
         self.reconnect_attempts = 0
+        self._prev_delay = self.reconnect_interval
         self.max_reconnect_attempts = 10
         
-        # Queues and locks
-        self.pending_requests: Dict[str, Dict] = {}
-        self.lock = threading.RLock()
+        # Requests awaiting a response, keyed by message tag; single dict
+        # operations are atomic, so no lock is needed
+        self.pending_requests: Dict[str, concurrent.futures.Future] = {}
         
-        # Keepalive mechanism
-        self.keepalive_thread = None
+        # Keepalive, handled by websocket-client's native ping/pong
         self.keepalive_interval = 20
+        self.keepalive_timeout = 10
+        
+        # Lifetimes of past connections (open -> close), in seconds
+        self._opened_at: Optional[float] = None
+        self._lifetimes: collections.deque = collections.deque(maxlen=CONNECTION_HISTORY_SIZE)
+        
+        # Handlers for tags processed internally; others go to on_message
+        self._handlers: Dict[str, Callable[[Any], bool]] = {"s1": self._handle_s1}
+        
+        # Outbound (frame, future) pairs, drained by whichever sender holds the flush lock
+        self._tx_queue = collections.deque()
+        self._tx_lock = threading.Lock()
+        
+        # Message events, delivered to on_message by a worker thread so that
+        # slow user callbacks do not stall the WebSocket read thread; the
+        # worker runs from connect() until disconnect()
+        self._event_q: queue.Queue = queue.Queue(maxsize=EVENT_QUEUE_SIZE)
+        self._worker: Optional[threading.Thread] = None
 
     def connect(self) -> bool:
         """
@@ -85,6 +156,9 @@ class WAConnection:
             
             url = f"{WA_WEB_URL}?{urlencode(query_params)}"
             
+            self._connected_evt.clear()
+            self._closing.clear()
+            self._start_dispatcher()
             self.ws = websocket.WebSocketApp(
                 url,
                 on_message=self._on_message,
@@ -97,28 +171,30 @@ class WAConnection:
                 }
             )
             
-            # Start WebSocket connection in a separate thread
-            ws_thread = threading.Thread(target=self.ws.run_forever)
+            # Start WebSocket connection in a separate thread; the library
+            # sends the keepalive pings and checks the pongs itself
+            ws_thread = threading.Thread(
+                target=self.ws.run_forever,
+                kwargs={
+                    "ping_interval": self.keepalive_interval,
+                    "ping_timeout": self.keepalive_timeout
+                }
+            )
             ws_thread.daemon = True
             ws_thread.start()
             
-            # Wait for connection to establish
+            # Wait for _on_open to signal the connection, without polling
             timeout = 30
-            start_time = time.time()
-            while not self.connected and time.time() - start_time < timeout:
-                time.sleep(0.5)
-            
-            if not self.connected:
+            if not self._connected_evt.wait(timeout) or not self.connected:
                 logger.error("Failed to connect within timeout period")
+                self._stop_dispatcher()
                 return False
-                
-            # Start keepalive mechanism
-            self._start_keepalive()
             
             return True
             
         except Exception as e:
             logger.error(f"Connection error: {e}")
+            self._stop_dispatcher()
             raise WAConnectionError(f"Failed to connect: {e}")
 
     def disconnect(self) -> None:
@@ -128,9 +204,8 @@ class WAConnection:
         try:
             logger.info("Disconnecting from WhatsApp Web...")
             
-            # Stop keepalive thread
-            if self.keepalive_thread and self.keepalive_thread.is_alive():
-                self.keepalive_thread = None
+            # Cancel any reconnect waiting on its backoff delay
+            self._closing.set()
             
             # Close WebSocket connection
             if self.ws:
@@ -139,6 +214,8 @@ class WAConnection:
                 
             self.connected = False
             self.authenticated = False
+            self._connected_evt.clear()
+            self._stop_dispatcher()
             
             logger.info("Disconnected from WhatsApp Web")
             
@@ -147,7 +224,15 @@ class WAConnection:
 
     def reconnect(self) -> bool:
         """
-        Attempt to reconnect to WhatsApp Web servers with exponential backoff.
+        Attempt to reconnect to WhatsApp Web servers with decorrelated jitter backoff.
+        
+        Each delay is drawn between the base interval and three times the
+        previous delay, capped at max_reconnect_interval, so clients dropped
+        together do not retry in lockstep.
+        
+        Blocks the calling thread for the delay, so it must not be called from
+        the WebSocket thread or from a callback; _on_close runs it on its own
+        thread. disconnect() interrupts the wait and cancels the attempt.
         
         Returns:
             bool: True if reconnection was successful, False otherwise
@@ -158,12 +243,15 @@ class WAConnection:
         
         self.reconnect_attempts += 1
         wait_time = min(
-            self.reconnect_interval * (self.reconnect_decay ** (self.reconnect_attempts - 1)),
-            self.max_reconnect_interval
+            self.max_reconnect_interval,
+            random.uniform(self.reconnect_interval, self._prev_delay * 3)
         )
+        self._prev_delay = wait_time
         
         logger.info(f"Attempting to reconnect in {wait_time:.2f} seconds (attempt {self.reconnect_attempts})")
-        time.sleep(wait_time)
+        if self._closing.wait(wait_time):
+            logger.info("Reconnection cancelled by disconnect")
+            return False
         
         try:
             # Ensure old connection is closed
@@ -180,60 +268,115 @@ class WAConnection:
             logger.error(f"Reconnection failed: {e}")
             return False
 
-    def send_message(self, data: Union[Dict, List, str], tag: Optional[str] = None) -> str:
+    def send_message(self, data: Union[Dict, List, str, bytes], tag: Optional[str] = None) -> str:
         """
         Send a message through the WebSocket connection.
         
         Args:
-            data: Message data to send
+            data: Message data to send; bytes are sent as already-encoded JSON
             tag: Optional message tag for tracking the response
             
         Returns:
             str: Message tag used for the message
             
         Raises:
-            WAConnectionError: If connection is not established
+            WAConnectionError: If connection is not established or the frame
+                could not be sent
         """
         if not self.connected or not self.ws:
             raise WAConnectionError("Not connected to WhatsApp Web")
         
         tag = tag or generate_message_tag()
         
+        # Frames are built as UTF-8 bytes and still sent as text frames
         if isinstance(data, (dict, list)):
-            data = json.dumps(data)
+            data = json_dumps(data)
+        elif isinstance(data, str):
+            data = data.encode("utf-8")
+        
+        message = b"%s,%s" % (tag.encode("utf-8"), data)
         
-        message = f"{tag},{data}"
+        # Whichever thread sends the frame records the outcome here, so a
+        # failure always reaches the caller that queued it
+        sent = concurrent.futures.Future()
+        self._tx_queue.append((message, sent))
+        self._flush_tx()
+        sent.result()
+        return tag
+
+    def send_request(self, data: Union[Dict, List, str], tag: Optional[str] = None,
+                     timeout: float = 30) -> Any:
+        """
+        Send a message and wait for the response carrying the same tag.
+        
+        Args:
+            data: Message data to send
+            tag: Optional message tag; generated if not provided
+            timeout: Maximum time to wait for the response, in seconds
+            
+        Returns:
+            Any: Parsed data of the response
+            
+        Raises:
+            WAConnectionError: If not connected or no response arrives in time
+        """
+        tag = tag or generate_message_tag()
+        future = concurrent.futures.Future()
+        self.pending_requests[tag] = future
         
         try:
-            logger.debug(f"Sending message: {message[:100]}...")
-            self.ws.send(message)
-            return tag
-        except Exception as e:
-            logger.error(f"Error sending message: {e}")
-            raise WAConnectionError(f"Failed to send message: {e}")
+            self.send_message(data, tag)
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            raise WAConnectionError(f"No response to request {tag} within {timeout} seconds")
+        finally:
+            self.pending_requests.pop(tag, None)
 
-    def register_callback(self, 
-                          on_message: Optional[Callable] = None,
-                          on_connect: Optional[Callable] = None,
-                          on_close: Optional[Callable] = None,
-                          on_error: Optional[Callable] = None) -> None:
+    def _flush_tx(self) -> None:
+        """
+        Send every queued frame, unless another thread is already flushing.
+        
+        The thread holding the flush lock keeps draining until the queue is
+        empty, so frames queued by concurrent senders go out in the same pass
+        instead of each caller waiting on the socket. Each frame is still
+        sent as its own WebSocket message, and its result or error is set on
+        the future queued with it; a failed frame does not stop the others.
+        """
+        debug = logger.isEnabledFor(logging.DEBUG)
+        while self._tx_queue and self._tx_lock.acquire(blocking=False):
+            try:
+                while self._tx_queue:
+                    message, sent = self._tx_queue.popleft()
+                    if debug:
+                        logger.debug("Sending message: %r...", message[:100])
+                    try:
+                        self.ws.send(message)
+                    except Exception as e:
+                        logger.error(f"Error sending message: {e}")
+                        sent.set_exception(WAConnectionError(f"Failed to send message: {e}"))
+                    else:
+                        sent.set_result(None)
+            finally:
+                self._tx_lock.release()
+
+    def register_callback(self, **callbacks: Optional[Callable]) -> None:
         """
         Register callbacks for WebSocket events.
         
         Args:
-            on_message: Callback for message events
-            on_connect: Callback for connection events
-            on_close: Callback for connection close events
-            on_error: Callback for error events
-        """
-        if on_message:
-            self.on_message_callback = on_message
-        if on_connect:
-            self.on_connect_callback = on_connect
-        if on_close:
-            self.on_close_callback = on_close
-        if on_error:
-            self.on_error_callback = on_error
+            **callbacks: Callbacks keyed by event name: on_message, on_connect,
+                on_close and on_error. None values are ignored.
+                
+        Raises:
+            TypeError: If an event name is not one of the above
+        """
+        unknown = callbacks.keys() - CALLBACK_EVENTS
+        if unknown:
+            raise TypeError(f"Unknown callback event(s): {', '.join(sorted(unknown))}")
+        
+        self._callbacks.update(
+            {event: callback for event, callback in callbacks.items() if callback}
+        )
 
     def _on_message(self, ws, message: str) -> None:
         """
@@ -241,52 +384,125 @@ class WAConnection:
         
         Args:
             ws: WebSocket instance
-            message: Received message
+            message: Received message, as text or as raw bytes
         """
         try:
             if not message:
                 return
                 
-            logger.debug(f"Received message: {message[:100]}...")
+            # Skip slicing the frame unless DEBUG output is enabled
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Received message: %r...", message[:100])
             
-            # Parse message tag and data
-            parts = message.split(",", 1)
-            if len(parts) < 2:
-                logger.warning(f"Received malformed message: {message[:50]}...")
+            # Split tag and data; binary frames are sliced without copying
+            frame = split_frame(message)
+            if frame is None:
+                logger.warning(f"Received malformed message: {message[:50]!r}...")
                 return
                 
-            tag = parts[0]
-            data_str = parts[1]
+            tag, payload = frame
             
-            # Binary message handling
-            if tag.startswith("pong"):
-                logger.debug("Received pong message")
-                return
-                
             # Try to parse JSON data
-            try:
-                data = json.loads(data_str)
-            except json.JSONDecodeError:
-                data = data_str
+            data = decode_payload(payload)
             
-            # Handle connection success message
-            if tag == "s1" and isinstance(data, dict) and data.get("status") == 200:
-                self.client_token = data.get("clientToken")
-                self.server_token = data.get("serverToken")
-                self.connected = True
-                logger.info("Successfully connected to WhatsApp Web")
-                
-                if self.on_connect_callback:
-                    self.on_connect_callback(self)
+            # Responses to send_request go straight to the waiting caller
+            future = self.pending_requests.pop(tag, None)
+            if future is not None:
+                future.set_result(data)
+                return
+            
+            # Dispatch tags handled internally
+            handler = self._handlers.get(tag)
+            if handler and handler(data):
                 return
             
-            # Call user callback
-            if self.on_message_callback:
-                self.on_message_callback(tag, data)
+            # Hand the event to the dispatch worker, if it is running
+            if self._worker is not None and self._callbacks.get("on_message"):
+                try:
+                    self._event_q.put_nowait((tag, data))
+                except queue.Full:
+                    logger.warning(f"Event queue full, dropping message: {tag}")
                 
         except Exception as e:
             logger.error(f"Error processing message: {e}")
 
+    def _handle_s1(self, data: Any) -> bool:
+        """
+        Handle the connection success message.
+        
+        Args:
+            data: Parsed message data
+            
+        Returns:
+            bool: True if the message was handled, False to pass it to on_message
+        """
+        if not isinstance(data, dict) or data.get("status") != 200:
+            return False
+            
+        self.client_token = data.get("clientToken")
+        self.server_token = data.get("serverToken")
+        self.connected = True
+        self._connected_evt.set()
+        logger.info("Successfully connected to WhatsApp Web")
+        
+        callback = self._callbacks.get("on_connect")
+        if callback:
+            callback(self)
+        return True
+
+    def _start_dispatcher(self) -> None:
+        """Start the message dispatch worker, unless it is already running."""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._event_q = queue.Queue(maxsize=EVENT_QUEUE_SIZE)
+        self._worker = threading.Thread(
+            target=self._dispatch_loop, args=(self._event_q,), daemon=True
+        )
+        self._worker.start()
+
+    def _stop_dispatcher(self) -> None:
+        """
+        Retire the message dispatch worker.
+        
+        Events already queued are still delivered; the worker then exits on
+        the None sentinel, or once it finds its queue empty after being retired.
+        """
+        worker, self._worker = self._worker, None
+        if worker is None:
+            return
+        try:
+            self._event_q.put_nowait(None)
+        except queue.Full:
+            pass
+
+    def _dispatch_loop(self, events: queue.Queue) -> None:
+        """
+        Deliver queued message events to the on_message callback.
+        
+        Runs on a dedicated daemon thread between connect() and disconnect().
+        
+        Args:
+            events: Queue of (tag, data) events; None stops the worker
+        """
+        me = threading.current_thread()
+        while True:
+            event = events.get()
+            try:
+                if event is None:
+                    return
+                tag, data = event
+                callback = self._callbacks.get("on_message")
+                if callback:
+                    callback(tag, data)
+            except Exception as e:
+                logger.error(f"Error in message callback: {e}")
+            finally:
+                events.task_done()
+            
+            # Retired while the queue was full, so the sentinel was not queued
+            if self._worker is not me and events.empty():
+                return
+
     def _on_open(self, ws) -> None:
         """
         Internal WebSocket connection open handler.
@@ -296,7 +512,10 @@ class WAConnection:
         """
         logger.info("WebSocket connection established")
         self.connected = True
+        self._connected_evt.set()
         self.reconnect_attempts = 0
+        self._prev_delay = self.reconnect_interval
+        self._opened_at = time.monotonic()
         
         # Initialize connection with server
         self._send_init_message()
@@ -312,15 +531,46 @@ class WAConnection:
         """
         was_connected = self.connected
         self.connected = False
+        self._connected_evt.clear()
+        
+        if self._opened_at is not None:
+            self._lifetimes.append(time.monotonic() - self._opened_at)
+            self._opened_at = None
+            self._adapt_intervals()
         
         logger.info(f"WebSocket connection closed: {close_status_code} - {close_reason}")
         
-        if self.on_close_callback:
-            self.on_close_callback(close_status_code, close_reason)
+        callback = self._callbacks.get("on_close")
+        if callback:
+            callback(close_status_code, close_reason)
             
-        # Attempt reconnection if the connection was previously established
-        if was_connected:
-            self.reconnect()
+        # Attempt reconnection if the connection was previously established,
+        # off the WebSocket thread so the backoff wait does not block it
+        if was_connected and not self._closing.is_set():
+            threading.Thread(target=self.reconnect, daemon=True).start()
+
+    def _adapt_intervals(self) -> None:
+        """
+        Tune keepalive and reconnect intervals from observed connection lifetimes.
+        
+        Connections that usually last long get sparser pings; connections that
+        drop quickly get faster pings to detect failure sooner and a shorter
+        reconnect base. Values take effect on the next connect.
+        """
+        if len(self._lifetimes) < MIN_CONNECTION_HISTORY:
+            return
+        
+        deciles = statistics.quantiles(self._lifetimes, n=10)
+        median, p90 = deciles[4], deciles[8]
+        
+        self.keepalive_interval = min(MAX_KEEPALIVE_INTERVAL, max(MIN_KEEPALIVE_INTERVAL, median / 2))
+        self.keepalive_timeout = min(10, self.keepalive_interval / 2)
+        self.reconnect_interval = min(self.max_reconnect_interval, max(MIN_RECONNECT_INTERVAL, p90 / 8))
+        
+        logger.debug(
+            "Adapted intervals: keepalive=%.1fs reconnect=%.1fs",
+            self.keepalive_interval, self.reconnect_interval
+        )
 
     def _on_error(self, ws, error) -> None:
         """
@@ -332,42 +582,22 @@ class WAConnection:
         """
         logger.error(f"WebSocket error: {error}")
         
-        if self.on_error_callback:
-            self.on_error_callback(error)
+        callback = self._callbacks.get("on_error")
+        if callback:
+            callback(error)
 
     def _send_init_message(self) -> None:
         """
         Send initial connection message to WhatsApp Web servers.
         """
-        init_message = {
-            "clientId": self.client_id,
-            "connectType": "WIFI_UNKNOWN",
-            "connectReason": "USER_ACTIVATED",
-            "userAgent": WA_USER_AGENT,
-            "webVersion": "2.2319.9",
-            "browserName": "Chrome"
-        }
-        
+        tokens = b""
         if self.client_token and self.server_token:
-            init_message["clientToken"] = self.client_token
-            init_message["serverToken"] = self.server_token
+            tokens = b',"clientToken":%s,"serverToken":%s' % (
+                json_dumps(self.client_token),
+                json_dumps(self.server_token)
+            )
             
-        self.send_message(init_message, "admin")
-
-    def _start_keepalive(self) -> None:
-        """
-        Start keepalive thread to maintain connection.
-        """
-        def keepalive_worker():
-            while self.connected and self.ws:
-                try:
-                    logger.debug("Sending keepalive ping")
-                    self.ws.send("?,,")
-                    time.sleep(self.keepalive_interval)
-                except Exception as e:
-                    logger.error(f"Keepalive error: {e}")
-                    break
-        
-        self.keepalive_thread = threading.Thread(target=keepalive_worker)
-        self.keepalive_thread.daemon = True
-        self.keepalive_thread.start()
+        self.send_message(
+            b"".join((b'{"clientId":', json_dumps(self.client_id), tokens, _INIT_PAYLOAD_SUFFIX)),
+            "admin"
+        )
@@ -12,13 +12,87 @@ import json
 import os
 import logging
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-from cryptography.hazmat.primitives import hashes, padding
-from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey, X25519PublicKey
 from cryptography.hazmat.backends import default_backend
 from typing import Dict, List, Tuple, Any, Optional, Union, Callable
 
 from .utils import get_logger
 
+# PyCryptodome (namespace Cryptodome, folosit deja de real_client) are un strat
+# Python mult mai subțire peste AES decât API-ul hazmat din cryptography.
+# Îl folosim doar dacă procesorul are AES-NI; altfel rămânem pe cryptography.
+try:
+    from Cryptodome.Cipher import AES as _AES
+    from Cryptodome.Util._cpu_features import have_aes_ni as _have_aes_ni
+    if not _have_aes_ni():
+        _AES = None
+except ImportError:
+    _AES = None
+
+
+def _hkdf_sha256(key: bytes, length: int, salt: bytes, info: bytes) -> bytes:
+    """HKDF (RFC 5869) cu SHA-256; starea HMAC cu cheia PRK este calculată o dată."""
+    prk = hmac.new(salt, key, hashlib.sha256).digest()
+    mac = hmac.new(prk, digestmod=hashlib.sha256)
+    t = b""
+    out = b""
+    i = 1
+    while len(out) < length:
+        m = mac.copy()
+        m.update(t + info + bytes((i,)))
+        t = m.digest()
+        out += t
+        i += 1
+    return out[:length]
+
+
+def _pkcs7_pad(data: bytes) -> bytes:
+    """Aplică padding PKCS7 pentru blocuri de 16 bytes."""
+    n = 16 - (len(data) & 15)
+    return data + bytes((n,)) * n
+
+
+def _pkcs7_unpad(data: bytes) -> bytes:
+    """
+    Elimină padding-ul PKCS7.
+    
+    Verificarea nu se ramifică după valoarea padding-ului: se parcurg mereu
+    ultimii 16 bytes și erorile se acumulează într-o mască, pentru a nu
+    expune un oracol de padding prin timpul de execuție.
+    """
+    if not data or len(data) & 15:
+        raise ValueError("Padding invalid")
+    n = data[-1]
+    # Nenul dacă n nu este în intervalul 1..16
+    acc = ((n - 1) | (16 - n)) >> 8 & 1
+    for i, b in enumerate(reversed(data[-16:])):
+        # Mască 0xff pentru pozițiile din padding (i < n), 0 în rest
+        in_pad = -((i - n) >> 8 & 1) & 0xff
+        acc |= (b ^ n) & in_pad
+    if acc:
+        raise ValueError("Padding invalid")
+    return data[:-n]
+
+
+def _aes_cbc_encrypt(key: bytes, iv: bytes, data: bytes, backend) -> bytes:
+    """Aplică padding PKCS7 și criptează cu AES-CBC."""
+    padded_data = _pkcs7_pad(data)
+    if _AES is not None:
+        return _AES.new(key, _AES.MODE_CBC, iv).encrypt(padded_data)
+    encryptor = Cipher(algorithms.AES(key), modes.CBC(iv), backend=backend).encryptor()
+    return encryptor.update(padded_data) + encryptor.finalize()
+
+
+def _aes_cbc_decrypt(key: bytes, iv: bytes, data: bytes, backend) -> bytes:
+    """Decriptează cu AES-CBC și elimină padding-ul PKCS7."""
+    if _AES is not None:
+        return _pkcs7_unpad(_AES.new(key, _AES.MODE_CBC, iv).decrypt(data))
+    decryptor = Cipher(algorithms.AES(key), modes.CBC(iv), backend=backend).decryptor()
+    return _pkcs7_unpad(decryptor.update(data) + decryptor.finalize())
+
+
 class WAEncryption:
     """
     Manager pentru criptarea și decriptarea mesajelor WhatsApp.
@@ -27,12 +101,20 @@ class WAEncryption:
     comunicării cu serverele WhatsApp Web, inclusiv gestionarea cheilor.
     """
     
-    def __init__(self):
-        """Inițializează managerul de criptare."""
+    def __init__(self, legacy_cbc: bool = False):
+        """
+        Inițializează managerul de criptare.
+        
+        Args:
+            legacy_cbc: Folosește formatul vechi AES-CBC + HMAC-SHA256 pentru
+                mesaje, în loc de AES-GCM (pentru sesiuni vechi)
+        """
         self.logger = get_logger("WAEncryption")
         self.backend = default_backend()
+        self.legacy_cbc = legacy_cbc
         
         # Chei pentru sesiune
+        self._priv = None
         self.private_key = None
         self.public_key = None
         self.shared_key = None
@@ -41,6 +123,10 @@ class WAEncryption:
         self.auth_key = None
         self.enc_key = None
         self.mac_key = None
+        self._hmac_template = None
+        self._hmac_template_key = None
+        self._aesgcm = None
+        self._aesgcm_key = None
         
     def generate_keys(self) -> Tuple[bytes, bytes]:
         """
@@ -49,10 +135,10 @@ class WAEncryption:
         Returns:
             tuple: (cheie_privată, cheie_publică)
         """
-        # În implementarea reală, aici s-ar genera o pereche de chei EC / Curve25519
-        # Pentru simplificare, simulăm generarea cheilor
-        self.private_key = os.urandom(32)
-        self.public_key = os.urandom(32)  # În realitate, s-ar calcula din cheia privată
+        # Generăm o pereche de chei Curve25519
+        self._priv = X25519PrivateKey.generate()
+        self.private_key = self._priv.private_bytes_raw()
+        self.public_key = self._priv.public_key().public_bytes_raw()
         
         return self.private_key, self.public_key
     
@@ -71,12 +157,12 @@ class WAEncryption:
             
         self.server_public_key = server_public_key
         
-        # În implementarea reală, aici s-ar calcula cheia comună folosind X25519
-        # Pentru simplificare, simulăm calculul cheii comune
-        h = hashlib.sha256()
-        h.update(self.private_key)
-        h.update(self.server_public_key)
-        self.shared_key = h.digest()
+        # Cheia privată poate fi setată direct (ex. la restaurarea sesiunii)
+        if self._priv is None or self._priv.private_bytes_raw() != self.private_key:
+            self._priv = X25519PrivateKey.from_private_bytes(self.private_key)
+        
+        peer = X25519PublicKey.from_public_bytes(server_public_key)
+        self.shared_key = self._priv.exchange(peer)
         
         return self.shared_key
     
@@ -92,16 +178,13 @@ class WAEncryption:
             
         # Derivăm cheile folosind HKDF (HMAC-based Key Derivation Function)
         # În implementarea reală, s-ar folosi algoritmi specifici WhatsApp
-        hkdf = HKDF(
-            algorithm=hashes.SHA256(),
-            length=80,
+        derived_key = _hkdf_sha256(
+            self.shared_key,
+            80,
             salt=b"WhatsApp Salt",
-            info=b"WhatsApp Derived Key",
-            backend=self.backend
+            info=b"WhatsApp Derived Key"
         )
         
-        derived_key = hkdf.derive(self.shared_key)
-        
         # Împărțim cheia derivată în cele trei componente
         self.auth_key = derived_key[0:32]   # Primii 32 de bytes pentru autentificare
         self.enc_key = derived_key[32:64]   # Următorii 32 pentru criptare
@@ -109,6 +192,26 @@ class WAEncryption:
         
         return self.auth_key, self.enc_key, self.mac_key
     
+    def _new_hmac(self) -> "hmac.HMAC":
+        """
+        Returnează un obiect HMAC-SHA256 nou pentru cheia MAC curentă.
+        
+        Cheia MAC e fixă pe durata sesiunii, deci starea HMAC cu cheia aplicată
+        se calculează o singură dată și se copiază pentru fiecare mesaj; se
+        recalculează dacă mac_key a fost schimbată între timp.
+        """
+        if self._hmac_template is None or self._hmac_template_key != self.mac_key:
+            self._hmac_template = hmac.new(self.mac_key, digestmod=hashlib.sha256)
+            self._hmac_template_key = self.mac_key
+        return self._hmac_template.copy()
+    
+    def _get_aesgcm(self) -> AESGCM:
+        """Returnează obiectul AES-GCM pentru cheia de criptare curentă."""
+        if self._aesgcm is None or self._aesgcm_key != self.enc_key:
+            self._aesgcm = AESGCM(self.enc_key)
+            self._aesgcm_key = self.enc_key
+        return self._aesgcm
+    
     def encrypt_message(self, message: bytes) -> bytes:
         """
         Criptează un mesaj pentru transmitere.
@@ -117,25 +220,29 @@ class WAEncryption:
             message: Mesajul de criptat
             
         Returns:
-            bytes: Mesajul criptat cu MAC
+            bytes: Mesajul criptat și autentificat
         """
         if not self.enc_key or not self.mac_key:
             raise ValueError("Cheile de sesiune nu au fost derivate")
             
+        if self.legacy_cbc:
+            return self._encrypt_message_cbc(message)
+            
+        # AES-256-GCM criptează și autentifică într-o singură trecere:
+        # iv (12) + ciphertext + tag (16)
+        iv = os.urandom(12)
+        return iv + self._get_aesgcm().encrypt(iv, message, None)
+    
+    def _encrypt_message_cbc(self, message: bytes) -> bytes:
+        """Criptează un mesaj în formatul vechi AES-CBC + HMAC-SHA256."""
         # Generăm un vector de inițializare (IV) aleator
         iv = os.urandom(16)
         
-        # Aplicăm padding pentru AES
-        padder = padding.PKCS7(128).padder()
-        padded_data = padder.update(message) + padder.finalize()
-        
-        # Criptăm mesajul folosind AES-256-CBC
-        cipher = Cipher(algorithms.AES(self.enc_key), modes.CBC(iv), backend=self.backend)
-        encryptor = cipher.encryptor()
-        ciphertext = encryptor.update(padded_data) + encryptor.finalize()
+        # Criptăm mesajul folosind AES-256-CBC (cu padding PKCS7)
+        ciphertext = _aes_cbc_encrypt(self.enc_key, iv, message, self.backend)
         
         # Calculăm MAC pentru autentificarea mesajului
-        h = hmac.new(self.mac_key, digestmod=hashlib.sha256)
+        h = self._new_hmac()
         h.update(iv + ciphertext)
         mac = h.digest()
         
@@ -160,6 +267,17 @@ class WAEncryption:
         if not self.enc_key or not self.mac_key:
             raise ValueError("Cheile de sesiune nu au fost derivate")
             
+        if self.legacy_cbc:
+            return self._decrypt_message_cbc(encrypted_message)
+            
+        # Tag-ul GCM este verificat în timpul decriptării
+        try:
+            return self._get_aesgcm().decrypt(encrypted_message[:12], encrypted_message[12:], None)
+        except InvalidTag:
+            raise ValueError("MAC invalid - mesaj posibil alterat")
+    
+    def _decrypt_message_cbc(self, encrypted_message: bytes) -> bytes:
+        """Decriptează un mesaj în formatul vechi AES-CBC + HMAC-SHA256."""
         # Despărțim mesajul în componentele sale
         iv = encrypted_message[:16]
         mac_start = len(encrypted_message) - 32  # MAC-ul are 32 de bytes (SHA-256)
@@ -167,21 +285,15 @@ class WAEncryption:
         received_mac = encrypted_message[mac_start:]
         
         # Verificăm MAC-ul
-        h = hmac.new(self.mac_key, digestmod=hashlib.sha256)
+        h = self._new_hmac()
         h.update(iv + ciphertext)
         calculated_mac = h.digest()
         
         if not hmac.compare_digest(calculated_mac, received_mac):
             raise ValueError("MAC invalid - mesaj posibil alterat")
             
-        # Decriptăm mesajul
-        cipher = Cipher(algorithms.AES(self.enc_key), modes.CBC(iv), backend=self.backend)
-        decryptor = cipher.decryptor()
-        padded_plaintext = decryptor.update(ciphertext) + decryptor.finalize()
-        
-        # Eliminăm padding-ul
-        unpadder = padding.PKCS7(128).unpadder()
-        plaintext = unpadder.update(padded_plaintext) + unpadder.finalize()
+        # Decriptăm mesajul și eliminăm padding-ul
+        plaintext = _aes_cbc_decrypt(self.enc_key, iv, ciphertext, self.backend)
         
         return plaintext
     
@@ -201,14 +313,8 @@ class WAEncryption:
         # Generăm un IV aleator
         iv = os.urandom(16)
         
-        # Aplicăm padding pentru AES
-        padder = padding.PKCS7(128).padder()
-        padded_key = padder.update(media_key) + padder.finalize()
-        
-        # Criptăm cheia folosind AES-256-CBC
-        cipher = Cipher(algorithms.AES(self.enc_key), modes.CBC(iv), backend=self.backend)
-        encryptor = cipher.encryptor()
-        encrypted_key = encryptor.update(padded_key) + encryptor.finalize()
+        # Criptăm cheia folosind AES-256-CBC (cu padding PKCS7)
+        encrypted_key = _aes_cbc_encrypt(self.enc_key, iv, media_key, self.backend)
         
         # Returnăm IV + cheia criptată
         return iv + encrypted_key
@@ -230,14 +336,8 @@ class WAEncryption:
         iv = encrypted_key[:16]
         ciphertext = encrypted_key[16:]
         
-        # Decriptăm cheia
-        cipher = Cipher(algorithms.AES(self.enc_key), modes.CBC(iv), backend=self.backend)
-        decryptor = cipher.decryptor()
-        padded_key = decryptor.update(ciphertext) + decryptor.finalize()
-        
-        # Eliminăm padding-ul
-        unpadder = padding.PKCS7(128).unpadder()
-        media_key = unpadder.update(padded_key) + unpadder.finalize()
+        # Decriptăm cheia și eliminăm padding-ul
+        media_key = _aes_cbc_decrypt(self.enc_key, iv, ciphertext, self.backend)
         
         return media_key
     
@@ -254,7 +354,8 @@ class WAEncryption:
         if not self.mac_key:
             raise ValueError("Cheia MAC nu a fost derivată")
             
-        h = hmac.new(self.mac_key, data, digestmod=hashlib.sha256)
+        h = self._new_hmac()
+        h.update(data)
         return h.digest()
     
     def verify_hmac(self, data: bytes, expected_hmac: bytes) -> bool:
@@ -1,27 +1,15 @@
 """
 Error classes for the wawspy library.
-"""
-
-class WABaseError(Exception):
-    """Base error class for all wawspy errors."""
-    pass
-
-class WAConnectionError(WABaseError):
-    """Error during WebSocket connection."""
-    pass
 
-class WAAuthenticationError(WABaseError):
-    """Error during authentication process."""
-    pass
-
-class WAMessageError(WABaseError):
-    """Error related to message sending/receiving."""
-    pass
-
-class WAMediaError(WABaseError):
-    """Error related to media handling."""
-    pass
+Kept for backwards compatibility; the classes are defined once in
+wawspy.exceptions so ``except WABaseError`` catches every wawspy error.
+"""
 
-class WAProtocolError(WABaseError):
-    """Error related to protocol handling."""
-    pass
+from .exceptions import (
+    WABaseError,
+    WAConnectionError,
+    WAAuthenticationError,
+    WAMessageError,
+    WAMediaError,
+    WAProtocolError,
+)
@@ -7,20 +7,161 @@ like images, videos, documents, and audio through WhatsApp Web.
 
 import base64
 import hashlib
+import hmac
 import json
 import logging
-import mimetypes
 import os
-import requests
+import tempfile
 import time
 from io import BytesIO
 from typing import Dict, Optional, Tuple, Union, BinaryIO, Any
 
-from .errors import WAMediaError
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+from .encryption import _hkdf_sha256, _pkcs7_unpad
+from .exceptions import WAMediaError
 from .utils import generate_random_filename
 
 logger = logging.getLogger(__name__)
 
+# Read size for hashing; large enough that hashing, not Python calls, dominates
+HASH_CHUNK_SIZE = 1 << 20
+
+# Chunk size used when streaming media downloads to disk
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+# HKDF info strings used to expand a media key, by media type
+MEDIA_KEY_INFO = {
+    "image": b"WhatsApp Image Keys",
+    "sticker": b"WhatsApp Image Keys",
+    "video": b"WhatsApp Video Keys",
+    "audio": b"WhatsApp Audio Keys",
+    "document": b"WhatsApp Document Keys",
+}
+
+# Encrypted media ends with the first 10 bytes of HMAC-SHA256(iv + ciphertext)
+MEDIA_MAC_SIZE = 10
+
+
+def _file_sha256(file_path: str) -> str:
+    """Return the hex SHA-256 digest of a file, streamed from disk."""
+    with open(file_path, 'rb', buffering=0) as f:
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        
+        sha256_hash = hashlib.sha256()
+        buf = memoryview(bytearray(HASH_CHUNK_SIZE))
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            sha256_hash.update(buf[:n])
+        return sha256_hash.hexdigest()
+
+
+def _expand_media_key(media_key: bytes, media_type: str) -> Tuple[bytes, bytes, bytes]:
+    """Expand a 32-byte media key into (iv, cipher_key, mac_key)."""
+    expanded = _hkdf_sha256(media_key, 112, salt=b"\0" * 32, info=MEDIA_KEY_INFO[media_type])
+    return expanded[:16], expanded[16:48], expanded[48:80]
+
+
+def _encrypt_media_stream(src: BinaryIO, out: BinaryIO, media_key: bytes, media_type: str) -> Tuple[bytes, bytes]:
+    """
+    Encrypt media from one file object into another in a single pass.
+    
+    Each chunk is read once and feeds the plaintext SHA-256, AES-CBC, the
+    HMAC over iv + ciphertext and the SHA-256 of the encrypted upload.
+    
+    Args:
+        src: Readable binary file object supporting readinto()
+        out: Writable binary file object for ciphertext + MAC
+        media_key: Raw 32-byte media key
+        media_type: One of the WAMedia.MEDIA_* types
+        
+    Returns:
+        tuple: (file_sha256, file_enc_sha256) as raw digests
+    """
+    iv, cipher_key, mac_key = _expand_media_key(media_key, media_type)
+    encryptor = Cipher(algorithms.AES(cipher_key), modes.CBC(iv)).encryptor()
+    mac = hmac.new(mac_key, iv, hashlib.sha256)
+    file_hash = hashlib.sha256()
+    enc_hash = hashlib.sha256()
+    
+    def write(ciphertext: bytes) -> None:
+        mac.update(ciphertext)
+        enc_hash.update(ciphertext)
+        out.write(ciphertext)
+    
+    buf = memoryview(bytearray(HASH_CHUNK_SIZE))
+    total = 0
+    while True:
+        n = src.readinto(buf)
+        if not n:
+            break
+        chunk = buf[:n]
+        total += n
+        file_hash.update(chunk)
+        write(encryptor.update(chunk))
+    
+    pad = 16 - (total & 15)
+    write(encryptor.update(bytes((pad,)) * pad) + encryptor.finalize())
+    
+    tag = mac.digest()[:MEDIA_MAC_SIZE]
+    enc_hash.update(tag)
+    out.write(tag)
+    
+    return file_hash.digest(), enc_hash.digest()
+
+
+def _decrypt_media_stream(chunks, out: BinaryIO, media_key: bytes, media_type: str) -> None:
+    """
+    Decrypt encrypted media chunk by chunk straight into a file object.
+    
+    The MAC is computed over the same chunks as they are decrypted and
+    checked once the stream ends, so the payload is never held in memory.
+    Plaintext is written to ``out`` before the MAC is known; on error the
+    caller must discard whatever was written (see WAMedia._save_media).
+    
+    Args:
+        chunks: Iterable of ciphertext chunks (e.g. response.iter_content())
+        out: Writable binary file object for the plaintext
+        media_key: Raw 32-byte media key
+        media_type: One of the WAMedia.MEDIA_* types
+        
+    Raises:
+        WAMediaError: If the MAC does not match or the padding is invalid
+    """
+    iv, cipher_key, mac_key = _expand_media_key(media_key, media_type)
+    decryptor = Cipher(algorithms.AES(cipher_key), modes.CBC(iv)).decryptor()
+    mac = hmac.new(mac_key, iv, hashlib.sha256)
+    
+    # The trailing MAC may straddle chunks, and the last plaintext block is
+    # held back until the end so its padding can be stripped
+    tail = b""
+    pending = b""
+    for chunk in chunks:
+        if not chunk:
+            continue
+        data = tail + chunk
+        tail = data[-MEDIA_MAC_SIZE:]
+        data = data[:-MEDIA_MAC_SIZE]
+        mac.update(data)
+        plain = pending + decryptor.update(data)
+        pending = plain[-16:]
+        out.write(plain[:-16])
+    
+    try:
+        plain = pending + decryptor.finalize()
+    except ValueError:
+        raise WAMediaError("Encrypted media is not a whole number of blocks")
+    if not hmac.compare_digest(mac.digest()[:MEDIA_MAC_SIZE], tail):
+        raise WAMediaError("Media MAC mismatch")
+    try:
+        out.write(_pkcs7_unpad(plain))
+    except ValueError:
+        raise WAMediaError("Invalid media padding")
+
+
 class WAMedia:
     """
     WhatsApp Web media handler.
@@ -66,6 +207,12 @@ class WAMedia:
         self.media_conn_info = None
         self.max_retries = 3
         self.retry_delay = 2  # seconds
+        
+        # Request headers are identical for every upload/download
+        self._headers = {
+            "Origin": "https://web.whatsapp.com",
+            "Referer": "https://web.whatsapp.com/",
+        }
     
     def determine_media_type(self, file_path: str) -> Tuple[str, str]:
         """
@@ -80,6 +227,8 @@ class WAMedia:
         Raises:
             WAMediaError: If the file type is not supported
         """
+        import mimetypes
+        
         mime_type, _ = mimetypes.guess_type(file_path)
         
         if not mime_type:
@@ -91,12 +240,14 @@ class WAMedia:
                 
         raise WAMediaError(f"Unsupported file type: {mime_type}")
     
-    def prepare_media(self, file_path: str) -> Dict[str, Any]:
+    def prepare_media(self, file_path: str, compute_hash: bool = True) -> Dict[str, Any]:
         """
         Prepare media for sending by calculating hashes and other metadata.
         
         Args:
             file_path: Path to the media file
+            compute_hash: Whether to read the file to compute file_hash; when
+                False, file_hash is None and the caller hashes the file itself
             
         Returns:
             dict: Media metadata including file size, hashes, etc.
@@ -114,14 +265,8 @@ class WAMedia:
             if file_size > self.MAX_SIZE.get(media_type, 16 * 1024 * 1024):
                 raise WAMediaError(f"File exceeds maximum size for {media_type}")
                 
-            # Calculate file hashes
-            sha256_hash = hashlib.sha256()
-            with open(file_path, 'rb') as f:
-                # Read and update hash in chunks to avoid loading large files into memory
-                for chunk in iter(lambda: f.read(4096), b""):
-                    sha256_hash.update(chunk)
-                    
-            file_hash = sha256_hash.hexdigest()
+            # Calculate file hash in large chunks to avoid loading the whole file
+            file_hash = _file_sha256(file_path) if compute_hash else None
             
             media_key = os.urandom(32)
             media_key_base64 = base64.b64encode(media_key).decode('utf-8')
@@ -153,8 +298,8 @@ class WAMedia:
             WAMediaError: If there's an error uploading the media
         """
         try:
-            # Prepare media metadata
-            media_info = self.prepare_media(file_path)
+            # Prepare media metadata; the file hash comes from the encryption pass
+            media_info = self.prepare_media(file_path, compute_hash=False)
             media_type = media_info["media_type"]
             mime_type = media_info["mime_type"]
             file_size = media_info["file_size"]
@@ -167,61 +312,52 @@ class WAMedia:
                 
             # Prepare upload request
             upload_url = f"{self.upload_url}/{media_type}"
-            headers = {
-                "Origin": "https://web.whatsapp.com",
-                "Referer": "https://web.whatsapp.com/",
-            }
+            headers = self._headers
             
             # This would include authentication tokens from media_conn_info
             auth_info = {}
             
-            # Upload the file
-            with open(file_path, 'rb') as f:
+            import requests  # imported here to keep it out of wawspy's import time
+            
+            # Encrypt once into a temporary file; one pass over the source also
+            # yields the file hash, the encrypted file hash and the MAC
+            with open(file_path, 'rb') as f, tempfile.TemporaryFile() as body:
+                file_sha256, file_enc_sha256 = _encrypt_media_stream(
+                    f, body, base64.b64decode(media_info["media_key"]), media_type
+                )
+                
                 for attempt in range(self.max_retries):
                     try:
                         logger.info(f"Uploading {media_type} file ({file_size} bytes)")
                         
-                        # In a real implementation, this would use the actual
-                        # WhatsApp upload endpoint and protocol
-                        # This is a placeholder for the upload request
-                        # response = requests.post(
-                        #     upload_url,
-                        #     headers=headers,
-                        #     data=auth_info,
-                        #     files={"file": (os.path.basename(file_path), f, mime_type)}
-                        # )
-                        
-                        # # Check response
-                        # if response.status_code == 200:
-                        #     upload_result = response.json()
-                        #     return {
-                        #         "url": upload_result.get("url"),
-                        #         "mimetype": mime_type,
-                        #         "filehash": media_info["file_hash"],
-                        #         "filesize": file_size,
-                        #         "mediaKey": media_info["media_key"],
-                        #         "type": media_type
-                        #     }
-                        # else:
-                        #     logger.warning(f"Upload failed with status {response.status_code}")
+                        body.seek(0)
+                        response = requests.post(
+                            upload_url,
+                            headers=headers,
+                            data=auth_info,
+                            files={"file": (os.path.basename(file_path), body, mime_type)}
+                        )
                         
-                        # Placeholder for successful upload result
-                        # In a real implementation, this would be returned by the server
-                        return {
-                            "url": f"https://mmg.whatsapp.net/{media_type}/{media_info['file_hash']}",
-                            "mimetype": mime_type,
-                            "filehash": media_info["file_hash"],
-                            "filesize": file_size,
-                            "mediaKey": media_info["media_key"],
-                            "type": media_type
-                        }
+                        # Check response
+                        if response.status_code == 200:
+                            upload_result = response.json()
+                            return {
+                                "url": upload_result.get("url"),
+                                "mimetype": mime_type,
+                                "filehash": file_sha256.hex(),
+                                "fileEncSha256": base64.b64encode(file_enc_sha256).decode('utf-8'),
+                                "filesize": file_size,
+                                "mediaKey": media_info["media_key"],
+                                "type": media_type
+                            }
+                            
+                        logger.warning(f"Upload failed with status {response.status_code}")
                         
-                    except Exception as e:
+                    except requests.RequestException as e:
                         logger.error(f"Upload attempt {attempt+1} failed: {e}")
-                        if attempt < self.max_retries - 1:
-                            time.sleep(self.retry_delay * (2 ** attempt))  # Exponential backoff
-                        else:
-                            raise
+                        
+                    if attempt < self.max_retries - 1:
+                        time.sleep(self.retry_delay * (2 ** attempt))  # Exponential backoff
                             
             raise WAMediaError("All upload attempts failed")
             
@@ -229,6 +365,33 @@ class WAMedia:
             logger.error(f"Error uploading media: {e}")
             raise WAMediaError(f"Failed to upload media: {e}")
     
+    def _save_media(self, chunks, output_path: str, media_key: Optional[Union[str, bytes]],
+                    media_type: str) -> None:
+        """
+        Write downloaded chunks to output_path, decrypting them if a media key is given.
+        
+        Data goes to a temporary file next to output_path, which only replaces
+        it once the whole stream (and its MAC) has been verified.
+        """
+        directory = os.path.dirname(os.path.abspath(output_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".media-", suffix=".part")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                if media_key:
+                    if isinstance(media_key, str):
+                        media_key = base64.b64decode(media_key)
+                    _decrypt_media_stream(chunks, f, media_key, media_type)
+                else:
+                    for chunk in chunks:
+                        f.write(chunk)
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+    
     def download_media(self, message: Dict[str, Any], output_path: Optional[str] = None) -> str:
         """
         Download media from a received message.
@@ -254,6 +417,7 @@ class WAMedia:
             file_name = message.get("fileName")
             
             # Determine file extension from mime type
+            import mimetypes
             extension = mimetypes.guess_extension(mime_type) or ""
             
             # Generate output filename if not provided
@@ -264,56 +428,40 @@ class WAMedia:
                     output_path = generate_random_filename("media", extension)
                     
             # Download the file
-            headers = {
-                "Origin": "https://web.whatsapp.com",
-                "Referer": "https://web.whatsapp.com/",
-            }
+            headers = self._headers
             
             # This would include authentication info
             auth_info = {}
             
+            import requests  # imported here to keep it out of wawspy's import time
+            
             for attempt in range(self.max_retries):
                 try:
                     logger.info(f"Downloading media from {media_url}")
                     
-                    # In a real implementation, this would use the actual
-                    # WhatsApp download protocol
-                    # This is a placeholder for the download request
-                    # response = requests.get(
-                    #     media_url,
-                    #     headers=headers,
-                    #     params=auth_info
-                    # )
-                    
-                    # # Check response
-                    # if response.status_code == 200:
-                    #     # Decrypt media using media_key if available
-                    #     content = response.content
-                    #     if media_key:
-                    #         # Decryption would be implemented here
-                    #         pass
-                            
-                    #     # Save to file
-                    #     with open(output_path, 'wb') as f:
-                    #         f.write(content)
+                    with requests.get(
+                        media_url,
+                        headers=headers,
+                        params=auth_info,
+                        stream=True
+                    ) as response:
+                        if response.status_code == 200:
+                            # Stream to disk, decrypting on the fly if a media key is present
+                            self._save_media(
+                                response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE),
+                                output_path,
+                                media_key,
+                                message.get("mediaType", self.MEDIA_DOCUMENT)
+                            )
+                            return output_path
                             
-                    #     return output_path
-                    # else:
-                    #     logger.warning(f"Download failed with status {response.status_code}")
-                    
-                    # Placeholder for successful download
-                    # In a real implementation, this would actually download and save the file
-                    with open(output_path, 'wb') as f:
-                        f.write(b"Placeholder for media content")  # This would be the actual content
+                        logger.warning(f"Download failed with status {response.status_code}")
                         
-                    return output_path
-                    
-                except Exception as e:
+                except requests.RequestException as e:
                     logger.error(f"Download attempt {attempt+1} failed: {e}")
-                    if attempt < self.max_retries - 1:
-                        time.sleep(self.retry_delay * (2 ** attempt))  # Exponential backoff
-                    else:
-                        raise
+                    
+                if attempt < self.max_retries - 1:
+                    time.sleep(self.retry_delay * (2 ** attempt))  # Exponential backoff
                         
             raise WAMediaError("All download attempts failed")
             
@@ -13,9 +13,11 @@ import os
 import re
 import signal
 import sys
+import threading
 import time
 import traceback
 import uuid
+import requests
 import websocket
 from Cryptodome.Cipher import AES
 from Cryptodome.Hash import SHA256
@@ -24,8 +26,14 @@ from Cryptodome.Random import get_random_bytes
 from io import BytesIO
 from PIL import Image
 import qrcode
+from qrcode.constants import ERROR_CORRECT_L
 from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
+from .utils import image_to_dark_rows, render_half_blocks
+
+# Trace-ul websocket este un flag global; îl setăm o singură dată, la import
+websocket.enableTrace(False)
+
 # Import pentru autentificare și criptare Signal
 # Încărcăm Signal Protocol cu o configurare care evită problemele cu protobuf
 try:
@@ -180,6 +188,9 @@ class WAClient:
         self.message_tag_counter = 0
         self.pending_requests = {}
         
+        # Generatorul QR, refolosit la fiecare reîmprospătare a codului
+        self._qr = None
+        
         # Callbacks pentru evenimente
         self.callbacks = {
             "qr_code": None,
@@ -275,12 +286,8 @@ class WAClient:
         self._generate_keys()
         
         try:
-            # Setăm trace-ul doar pentru debugging
-            websocket.enableTrace(False)
-            
             # Simulăm sesiunea de browser prin efectuarea unui request HTTP inițial
             # pentru a obține cookies și alte informații necesare
-            import requests
             session = requests.Session()
             headers = {
                 "User-Agent": WA_WEB_PARAMS["UA"],
@@ -344,7 +351,6 @@ class WAClient:
             )
             
             # Rulăm WebSocket într-un thread separat
-            import threading
             # Rulăm WebSocket cu parametri optimizați
             websocket_thread = threading.Thread(target=lambda: self.ws.run_forever(
                 # Opțiuni suplimentare pentru WebSocket care cresc compatibilitatea
@@ -414,7 +420,6 @@ class WAClient:
             })
             
         # Reconectare după un delay
-        import threading
         delay = WA_WEB_PARAMS["RECONNECT_INTERVAL_MS"] / 1000
         self.logger.info(f"Așteptăm {delay} secunde înainte de reconectare...")
         threading.Timer(delay, self.connect).start()
@@ -662,7 +667,6 @@ class WAClient:
             self.logger.error(f"Eroare la trimiterea ping-ului: {e}")
             
         # Reprogramăm următorul ping
-        import threading
         interval = WA_WEB_PARAMS["KEEPALIVE_INTERVAL_MS"] / 1000
         threading.Timer(interval, self._start_keepalive).start()
         
@@ -773,19 +777,20 @@ class WAClient:
         Returns:
             Image.Image: Imaginea codului QR
         """
-        import qrcode
-        from qrcode.constants import ERROR_CORRECT_L
-        
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=ERROR_CORRECT_L,
-            box_size=10,
-            border=4
-        )
-        qr.add_data(qr_data)
-        qr.make(fit=True)
+        # Codul QR este reîmprospătat la ~20 de secunde; refolosim generatorul
+        if self._qr is None:
+            self._qr = qrcode.QRCode(
+                version=1,
+                error_correction=ERROR_CORRECT_L,
+                box_size=10,
+                border=4
+            )
+        else:
+            self._qr.clear()
+        self._qr.add_data(qr_data)
+        self._qr.make(fit=True)
         
-        return qr.make_image(fill_color="black", back_color="white")
+        return self._qr.make_image(fill_color="black", back_color="white")
         
     def _display_qr_terminal(self, qr_image: Image.Image) -> None:
         """
@@ -794,30 +799,8 @@ class WAClient:
         Args:
             qr_image: Imaginea codului QR
         """
-        # Convertim imaginea la alb/negru
-        qr_image = qr_image.convert('RGB')
-        width, height = qr_image.size
-        
-        # Afișăm imaginea în terminal
-        for y in range(0, height, 2):
-            line = ""
-            for x in range(width):
-                if y + 1 < height:
-                    upper_pixel = qr_image.getpixel((x, y))[0] < 128
-                    lower_pixel = qr_image.getpixel((x, y + 1))[0] < 128
-                    
-                    if upper_pixel and lower_pixel:
-                        line += "█"
-                    elif upper_pixel:
-                        line += "▀"
-                    elif lower_pixel:
-                        line += "▄"
-                    else:
-                        line += " "
-                else:
-                    pixel = qr_image.getpixel((x, y))[0] < 128
-                    line += "▀" if pixel else " "
-            print(line)
+        # Convertim imaginea la alb/negru și o afișăm în terminal
+        print("\n".join(render_half_blocks(image_to_dark_rows(qr_image))))
             
         print("\nScanați acest cod QR cu aplicația WhatsApp de pe telefonul dvs.")
         
@@ -849,7 +832,6 @@ class WAClient:
             
         self.logger.info(f"Așteptăm autentificarea timp de {timeout} secunde...")
         
-        import threading
         start_time = time.time()
         auth_event = threading.Event()
         
@@ -5,13 +5,23 @@ Acest modul conține funcții utilitare pentru diverse componente ale biblioteci
 """
 
 import base64
+import functools
 import json
 import logging
 import random
 import string
 import time
 import uuid
-from typing import Dict, Any, Optional, List, Callable, Union
+from typing import Dict, Any, Optional, List, Callable, Tuple, Union
+
+# orjson este opțional; fără el folosim modulul json standard
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Encoder compact, refolosit când orjson nu este disponibil
+_json_encode = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False).encode
 
 def get_logger(name: str) -> logging.Logger:
     """
@@ -63,6 +73,139 @@ def generate_random_id(length: int = 16) -> str:
     """
     return ''.join(random.choices(string.ascii_letters + string.digits, k=length))
 
+def generate_random_filename(prefix: str = "file", extension: str = "") -> str:
+    """
+    Generează un nume de fișier aleator.
+
+    Args:
+        prefix: Prefixul numelui de fișier
+        extension: Extensia, inclusiv punctul (ex. ".jpg")
+
+    Returns:
+        str: Numele de fișier generat
+    """
+    return f"{prefix}_{generate_random_id(8)}{extension}"
+
+# Caractere half-block indexate după (pixel_sus << 1) | pixel_jos, 1 = pixel închis
+HALF_BLOCK_TABLE = {0: " ", 1: "▄", 2: "▀", 3: "█"}
+
+# Tabel de prag pentru Image.point: 1 pentru pixelii închiși (< 128), 0 altfel
+DARK_PIXEL_LUT = [1 if value < 128 else 0 for value in range(256)]
+
+def image_to_dark_rows(image) -> List[bytes]:
+    """
+    Convertește o imagine PIL în rânduri de pixeli 0/1 (1 = pixel închis).
+    
+    Pragul este aplicat de Pillow printr-un singur tabel de căutare, fără
+    acces per pixel din Python.
+    
+    Args:
+        image: Imaginea PIL
+        
+    Returns:
+        List[bytes]: Câte un obiect bytes pentru fiecare rând de pixeli
+    """
+    mask = image.convert('L').point(DARK_PIXEL_LUT)
+    width = mask.size[0]
+    pixels = mask.tobytes()
+    return [pixels[i:i + width] for i in range(0, len(pixels), width)]
+
+def render_half_blocks(rows: List[bytes]) -> List[str]:
+    """
+    Randează rânduri de pixeli 0/1 ca linii de terminal, două rânduri per linie.
+    
+    Args:
+        rows: Rândurile de pixeli, fiecare byte fiind 0 sau 1
+        
+    Returns:
+        List[str]: Liniile de afișat în terminal
+    """
+    lines = []
+    for y in range(0, len(rows), 2):
+        upper = rows[y]
+        lower = rows[y + 1] if y + 1 < len(rows) else bytes(len(upper))
+        
+        # Fiecare byte este 0 sau 1, deci deplasarea rândului de sus cu un bit
+        # și combinarea cu rândul de jos produce coduri 0..3 fără transport
+        codes = (
+            int.from_bytes(upper, 'big') << 1 | int.from_bytes(lower, 'big')
+        ).to_bytes(len(upper), 'big')
+        lines.append(codes.decode('latin-1').translate(HALF_BLOCK_TABLE))
+    return lines
+
+def split_frame(message: Union[bytes, str]) -> Optional[Tuple[str, Union[memoryview, str]]]:
+    """
+    Separă tag-ul de conținutul unui cadru în format tag,date.
+    
+    Pentru cadrele primite ca octeți, conținutul este un memoryview peste
+    cadrul original, fără copiere și fără decodarea întregului cadru.
+    
+    Args:
+        message: Cadrul primit, ca octeți sau text
+        
+    Returns:
+        Optional[Tuple[str, Union[memoryview, str]]]: Tag-ul și conținutul,
+            sau None dacă lipsește separatorul
+    """
+    if isinstance(message, str):
+        idx = message.find(',')
+        if idx < 0:
+            return None
+        return message[:idx], message[idx + 1:]
+    
+    idx = message.find(b',')
+    if idx < 0:
+        return None
+    return message[:idx].decode('ascii'), memoryview(message)[idx + 1:]
+
+def json_dumps(obj: Any) -> bytes:
+    """
+    Serializează un obiect ca JSON compact, codificat UTF-8.
+    
+    Args:
+        obj: Obiectul de serializat
+        
+    Returns:
+        bytes: Documentul JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return _json_encode(obj).encode('utf-8')
+
+def decode_payload(payload: Union[memoryview, bytes, str]) -> Any:
+    """
+    Decodează conținutul unui cadru: JSON dacă este posibil, altfel text sau octeți.
+    
+    Args:
+        payload: Conținutul cadrului, așa cum îl întoarce split_frame
+        
+    Returns:
+        Any: Obiectul JSON, textul sau octeții conținutului
+    """
+    # orjson parsează direct din memoryview; json standard cere octeți
+    if orjson is not None:
+        try:
+            return orjson.loads(payload)
+        except orjson.JSONDecodeError:
+            pass
+    
+    if isinstance(payload, memoryview):
+        payload = payload.tobytes()
+    
+    if orjson is None:
+        try:
+            return json.loads(payload)
+        except ValueError:
+            pass
+    
+    if isinstance(payload, bytes):
+        try:
+            return payload.decode('utf-8')
+        except UnicodeDecodeError:
+            pass
+    return payload
+
+@functools.lru_cache(maxsize=4096)
 def phone_number_to_jid(phone: str) -> str:
     """
     Convertește un număr de telefon în format JID (Jabber ID).
@@ -76,6 +219,7 @@ def phone_number_to_jid(phone: str) -> str:
     phone = phone.lstrip('+')
     return f"{phone}@s.whatsapp.net"
 
+@functools.lru_cache(maxsize=4096)
 def jid_to_phone(jid: str) -> str:
     """
     Extrage numărul de telefon dintr-un JID.
@@ -98,6 +242,10 @@ class ReconnectionManager:
     Implementează backoff exponențial și gestionarea tentativelor de reconectare.
     """
     
+    # Atribute fixe, fără __dict__ per instanță
+    __slots__ = ("initial_delay_ms", "max_delay_ms", "max_attempts", "decay_factor",
+                 "random_factor", "attempt_count")
+    
     def __init__(self, initial_delay_ms: int = 3000, 
                  max_delay_ms: int = 60000, 
                  max_attempts: int = 10,
@@ -176,12 +176,7 @@ class WAAuthentication:
             # If we fail, generate a test QR code for demonstration
             try:
                 test_qr_data = "1@ABCDEFGhIjKlMnOpQrStUvWxYz0123456789ABCDEFG,1684933251,1"
-                qr_image = self.generate_qr_image(test_qr_data)
-                
-                qr_event_data = {
-                    'qr_data': test_qr_data,
-                    'qr_image': qr_image
-                }
+                qr_event_data = self._build_qr_event(test_qr_data)
                 if self.connection and hasattr(self.connection, 'event_emitter'):
                     self.connection.event_emitter.emit(WAEventType.QR_CODE, qr_event_data)
                     self.logger.info("Generated fallback test QR code for demonstration only")
@@ -266,19 +261,51 @@ class WAAuthentication:
         Returns:
             bytes: PNG image data
         """
-        # Generate QR code directly using the simpler API
-        import qrcode
-        # Use simpler direct image generation
         try:
-            img = qrcode.make(qr_data)
-            buf = BytesIO()
-            img.save(buf, format='PNG')
-            return buf.getvalue()
+            return self._qr_to_png(self._make_qr(qr_data))
         except Exception as e:
             self.logger.error(f"Failed to generate QR code image: {e}")
             # Return an empty image in case of error
             return b''
     
+    def _make_qr(self, qr_data: str) -> qrcode.QRCode:
+        """Encode QR data into a QR code"""
+        qr = qrcode.QRCode()
+        qr.add_data(qr_data)
+        qr.make(fit=True)
+        return qr
+    
+    def _qr_to_png(self, qr: qrcode.QRCode) -> bytes:
+        """Render an encoded QR code as PNG image data"""
+        buf = BytesIO()
+        qr.make_image().save(buf, format='PNG')
+        return buf.getvalue()
+    
+    def _build_qr_event(self, qr_data: str) -> Dict[str, Any]:
+        """
+        Build the QR code event payload, encoding the data only once
+        
+        Args:
+            qr_data: QR code data string
+            
+        Returns:
+            dict: QR data, PNG image and module matrix
+        """
+        try:
+            qr = self._make_qr(qr_data)
+            qr_image = self._qr_to_png(qr)
+            qr_matrix = qr.get_matrix()
+        except Exception as e:
+            self.logger.error(f"Failed to generate QR code image: {e}")
+            qr_image = b''
+            qr_matrix = []
+        
+        return {
+            'qr_data': qr_data,
+            'qr_image': qr_image,
+            'qr_matrix': qr_matrix
+        }
+    
     async def process_authentication_response(self, response_data: Dict):
         """
         Process authentication response from server
@@ -312,14 +339,10 @@ class WAAuthentication:
         """
         self.qr_code = qr_data
         
-        # Generate QR code image
-        qr_image = self.generate_qr_image(qr_data)
+        # Generate QR code image and module matrix
+        qr_event_data = self._build_qr_event(qr_data)
         
         # Emit QR code event
-        qr_event_data = {
-            'qr_data': qr_data,
-            'qr_image': qr_image
-        }
         if self.connection and hasattr(self.connection, 'event_emitter'):
             self.connection.event_emitter.emit(WAEventType.QR_CODE, qr_event_data)
     